@@ -0,0 +1,54 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.template import Template, TemplateSyntaxError
+
+from apps.core.warmup import template_names
+
+
+class Command(BaseCommand):
+    help = (
+        "Compile every template on disk, and the subject, body, and variables"
+        " of every mailer template, failing on the first syntax errors."
+    )
+
+    def handle(self, *args, **options):
+        from apps.mailer.models.template import MailerTemplate
+        from apps.mailer.models.variable import MailerVariable
+
+        compiled = 0
+        errors = []
+        for engine, name in template_names():
+            try:
+                engine.get_template(name)
+            except (TemplateSyntaxError, UnicodeDecodeError) as error:
+                errors.append("%s: %s" % (name, error))
+            compiled += 1
+
+        sources = [
+            ("Mailer template %r %s" % (template.name, field),
+             getattr(template, field))
+            for template in MailerTemplate.objects.only(
+                "name", "subject", "body"
+            )
+            for field in ("subject", "body")
+        ] + [
+            ("Mailer variable %r" % name, value)
+            for name, value in MailerVariable.objects.values_list(
+                "name", "value"
+            )
+        ]
+        for label, source in sources:
+            try:
+                Template(source)
+            except TemplateSyntaxError as error:
+                errors.append("%s: %s" % (label, error))
+            compiled += 1
+
+        if errors:
+            raise CommandError(
+                "%d of %d templates failed to compile.\n%s" % (
+                    len(errors), compiled, "\n".join(errors)
+                )
+            )
+        self.stdout.write(
+            self.style.SUCCESS("%d templates compiled." % compiled)
+        )
@@ -0,0 +1,53 @@
+import time
+
+from django.conf import settings
+
+from .routers import use_replica
+
+
+REPLICA_PIN_COOKIE = "primary_until"
+REPLICA_PIN_SECONDS = getattr(settings, "REPLICA_PIN_SECONDS", 10)
+REPLICA_URL_SUFFIXES = ("_changelist", "autocomplete")
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Allow GET requests of admin changelists (with their facets and search)
+    and autocompletes to read from the replica database.
+
+    Any other request is a potential write, after which the browser's reads
+    stay on the primary for REPLICA_PIN_SECONDS, to outlast replication lag.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = use_replica.set(False)
+        try:
+            response = self.get_response(request)
+        finally:
+            use_replica.reset(token)
+        if request.method not in ("GET", "HEAD"):
+            response.set_cookie(
+                REPLICA_PIN_COOKIE,
+                str(int(time.time()) + REPLICA_PIN_SECONDS),
+                max_age=REPLICA_PIN_SECONDS,
+                httponly=True,
+                samesite="Lax",
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if request.method not in ("GET", "HEAD"):
+            return None
+        url_name = request.resolver_match.url_name or ""
+        if not url_name.endswith(REPLICA_URL_SUFFIXES):
+            return None
+        try:
+            pinned_until = int(request.COOKIES.get(REPLICA_PIN_COOKIE, 0))
+        except ValueError:
+            pinned_until = 0
+        if pinned_until < time.time():
+            use_replica.set(True)
+        return None
@@ -0,0 +1,44 @@
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+
+
+REPLICA_DATABASE = getattr(settings, "REPLICA_DATABASE", "replica")
+
+# Whether reads of the current request may be served by the replica.
+use_replica = ContextVar("use_replica", default=False)
+
+
+class ReplicaRouter:
+    """
+    Send reads of read-only admin listings to a replica database.
+
+    Reads only go to the replica while use_replica is set, for requests that
+    ReplicaRoutingMiddleware allows, and never within a transaction or after
+    a write. Everything else uses the primary ("default") database.
+    """
+
+    def db_for_read(self, model, **hints):
+        if (
+            use_replica.get()
+            and REPLICA_DATABASE in settings.DATABASES
+            and not connections["default"].in_atomic_block
+        ):
+            return REPLICA_DATABASE
+        return None
+
+    def db_for_write(self, model, **hints):
+        use_replica.set(False)
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = ("default", REPLICA_DATABASE)
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db == REPLICA_DATABASE:
+            return False
+        return None
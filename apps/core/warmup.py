@@ -0,0 +1,93 @@
+from pathlib import Path
+
+from django.contrib import admin
+from django.db import connections
+from django.template import TemplateDoesNotExist, TemplateSyntaxError, engines
+from django.urls import get_resolver, reverse
+
+
+def warm_up_urls():
+    """Build the URL resolver, and reverse the URL of every admin page."""
+    get_resolver().resolve("/")
+    reverse("admin:index")
+    for model in admin.site._registry:
+        reverse("admin:%s_%s_changelist" % (
+            model._meta.app_label, model._meta.model_name
+        ))
+
+
+def loader_dirs(loaders):
+    """Directories that template loaders, and those they wrap, read from."""
+    for loader in loaders:
+        if hasattr(loader, "loaders"):
+            yield from loader_dirs(loader.loaders)
+        elif hasattr(loader, "get_dirs"):
+            yield from loader.get_dirs()
+
+
+def template_dirs(engine):
+    """
+    Directories of the templates of an engine.
+
+    Django engines are asked through their loaders, since the app
+    directories are only in engine.template_dirs with APP_DIRS, which the
+    production settings turn off in favor of explicit loaders.
+    """
+    if not hasattr(engine, "engine"):
+        return engine.template_dirs
+    return dict.fromkeys(loader_dirs(engine.engine.template_loaders))
+
+
+def template_names():
+    """Every template on disk, as (engine, template name) pairs."""
+    for engine in engines.all():
+        names = set()
+        for directory in template_dirs(engine):
+            for path in sorted(Path(directory).rglob("*")):
+                name = path.relative_to(directory).as_posix()
+                # Only the first of templates sharing a name is ever loaded.
+                if path.is_file() and name not in names:
+                    names.add(name)
+                    yield engine, name
+
+
+def warm_up_templates():
+    """Compile every template on disk into the cached template loaders."""
+    compiled = 0
+    for engine, name in template_names():
+        try:
+            engine.get_template(name)
+        except (TemplateDoesNotExist, TemplateSyntaxError):
+            continue
+        compiled += 1
+    return compiled
+
+
+def warm_up_mailer():
+    """Analyze the subject, body, and variables of every mailer template."""
+    from apps.mailer.analysis import required_variables
+    from apps.mailer.models.template import MailerTemplate
+    from apps.mailer.models.variable import MailerVariable
+
+    variables = tuple(MailerVariable.objects.values_list("name", "value"))
+    for subject, body in MailerTemplate.objects.values_list("subject", "body"):
+        required_variables((subject, body), variables)
+
+
+def warm_up():
+    """
+    Do the work that every worker would otherwise repeat on first requests.
+
+    Meant to run once, in a preloaded gunicorn master process, before forking
+    workers, which then share the results. Database connections, and their
+    pools, are closed afterwards, so that workers never share them.
+    """
+    warm_up_urls()
+    warm_up_templates()
+    try:
+        warm_up_mailer()
+    finally:
+        for connection in connections.all(initialized_only=True):
+            connection.close()
+            if hasattr(connection, "close_pool"):
+                connection.close_pool()
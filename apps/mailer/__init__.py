@@ -5,3 +5,8 @@ class MailerConfig(AppConfig):
     app_label = "mailer"
     name = "apps.mailer"
     verbose_name = verbose_name_plural =  "Mailer"
+
+    def ready(self):
+        from . import checks
+        from .signals import connect_signals
+        connect_signals()
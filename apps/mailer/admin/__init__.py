@@ -1,3 +1,5 @@
+from .archive import MailerArchivedMessageAdmin
 from .message import MailerMessageAdmin
+from .suppression import MailerSuppressionAdmin
 from .template import MailerTemplateAdmin
 from .variable import MailerVariableAdmin
@@ -0,0 +1,88 @@
+from django.contrib import admin, messages
+from django.utils.translation import ngettext
+
+from ..export import export_response
+from ..models.archive import MailerArchivedMessage
+from ..retention import PURGE_DAYS, purge_archive, retention_cutoff
+
+
+@admin.register(MailerArchivedMessage)
+class MailerArchivedMessageAdmin(admin.ModelAdmin):
+    """Archived message administration."""
+    model = MailerArchivedMessage
+    date_hierarchy = "created_at"
+    fieldsets = (
+        (None, {"fields": ("status", "message_id")}),
+        ("Addresses", {"fields": (
+            "from_address", "reply_to_address", "to_address", "cc_addresses"
+        )}),
+        ("Contents", {"fields": ("subject", "body")}),
+        ("Time", {"fields": ("created_at", "sent_at", "archived_at")})
+    )
+    list_display = ("status", "created_at", "to_address", "sent_at")
+    list_filter = ("status", "created_at", "sent_at")
+    readonly_fields = (
+        "status", "message_id", "from_address", "reply_to_address",
+        "to_address", "cc_addresses", "subject", "body",
+        "created_at", "sent_at", "archived_at"
+    )
+    search_fields = ("to_email", "subject")
+    show_facets = admin.ShowFacets.ALLOW
+    show_full_result_count = False
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+    @admin.action(description="Export selected Archived Messages as CSV")
+    def export_csv(self, request, queryset):
+        return export_response(request, queryset, format="csv")
+
+    @admin.action(description="Export selected Archived Messages as JSONL")
+    def export_jsonl(self, request, queryset):
+        return export_response(request, queryset, format="jsonl")
+
+    def has_purge_permission(self, request):
+        return request.user.has_perm(
+            "%s.delete_%s" % (
+                self.model._meta.app_label, self.model._meta.model_name
+            )
+        )
+
+    @admin.action(
+        description=(
+            "Purge selected Archived Messages past the retention period"
+        ),
+        permissions=("purge",),
+    )
+    def purge_archived_messages(self, request, queryset):
+        purged = purge_archive(
+            queryset.filter(created_at__lt=retention_cutoff(PURGE_DAYS)),
+            pause=0,
+        )
+
+        level = messages.WARNING
+        if purged > 0:
+            level = messages.SUCCESS
+
+        self.message_user(
+            request=request,
+            message=ngettext(
+                singular=(
+                    "%d archived e-mail past the retention period was purged."
+                ),
+                plural=(
+                    "%d archived e-mails past the retention period"
+                    " were purged."
+                ),
+                number=purged,
+            ) % purged,
+            level=level,
+        )
+
+    actions = (export_csv, export_jsonl, purge_archived_messages)
@@ -1,16 +1,33 @@
+from functools import partial
+
 from django.conf import settings
 from django.contrib import admin, messages
-from django.core.mail import get_connection, EmailMultiAlternatives
+from django.core.cache import caches
+from django.core.exceptions import PermissionDenied
 from django.http import HttpResponseRedirect
 from django.shortcuts import render
+from django.template.loader import render_to_string
 from django.urls import path, reverse
+from django.utils.cache import get_conditional_response, patch_cache_control
 from django.utils.html import format_html
-from django.utils.timezone import now
+from django.utils.http import http_date
+from django.utils.safestring import mark_safe
 from django.utils.translation import ngettext
 
 from .inlines.recipient import MailerRecipientTabularInline
 
+from ..delivery import send_messages
+from ..delivery.spool import spool_messages
+from ..export import export_response
+from ..jobs import session_jobs, start_job
 from ..models.message import MailerMessage, MailerMessageStatus
+from ..retention import (
+    PURGE_DAYS, RETAINED_STATUSES, purge_messages, retention_cutoff
+)
+
+
+VIEWER_CACHE = getattr(settings, "MAILER_VIEWER_CACHE", "default")
+VIEWER_CACHE_TIMEOUT = getattr(settings, "MAILER_VIEWER_CACHE_TIMEOUT", 86400)
 
 
 @admin.register(MailerMessage)
@@ -21,7 +38,7 @@ class MailerMessageAdmin(admin.ModelAdmin):
     change_list_template = "message_changelist.html"
     date_hierarchy = "created_at"
     fieldsets = (
-        (None, {"fields": ("status",)}),
+        (None, {"fields": ("status", "message_id")}),
         ("Addresses", {"fields": (
             "from_address", "reply_to_address", "to_address"
         )}),
@@ -37,8 +54,9 @@ class MailerMessageAdmin(admin.ModelAdmin):
         "from_email", "reply_to_email", "created_at", "sent_at", "status"
     )
     readonly_fields = (
-        "status", "from_address", "reply_to_address", "to_address",
-        "subject", "body", "view_message_field", "created_at", "sent_at"
+        "status", "message_id", "from_address", "reply_to_address",
+        "to_address", "subject", "body", "view_message_field",
+        "created_at", "sent_at"
     )
     save_as = True
     save_on_top = True
@@ -49,13 +67,31 @@ class MailerMessageAdmin(admin.ModelAdmin):
     show_facets = admin.ShowFacets.ALWAYS
     show_full_result_count = True
 
+    def changelist_view(self, request, extra_context=None):
+        extra_context = {
+            "jobs": session_jobs(request), **(extra_context or {})
+        }
+        return super().changelist_view(request, extra_context)
+
     def change_view(self, request, object_id, form_url='', extra_context=None):
         if request.GET.get('view') == "true":
-            return self.view_message_view(request, object_id)
+            return HttpResponseRedirect(
+                reverse(
+                    viewname="admin:mailer_mailermessage_view",
+                    kwargs={"object_id": object_id}
+                )
+            )
         return super().change_view(request, object_id, form_url, extra_context)
 
     def get_urls(self):
         return [
+            path(
+                "<path:object_id>/view/",
+                self.admin_site.admin_view(
+                    self.view_message_view, cacheable=True
+                ),
+                name="mailer_mailermessage_view",
+            ),
             path("<int:obj_id>/change/cancel/", self.cancel_queued_message),
             path("<int:obj_id>/change/send/", self.send_queued_message),
             path("cancelall/", self.cancel_all),
@@ -90,23 +126,74 @@ class MailerMessageAdmin(admin.ModelAdmin):
         return format_html(
             '<a href="%s">%s</a>' % (
                 reverse(
-                    viewname="admin:mailer_mailermessage_change",
+                    viewname="admin:mailer_mailermessage_view",
                     kwargs={"object_id": obj.pk}
-                ) + "?view=true",
+                ),
                 link_text
             )
         )
 
-    def view_message_view(self, request, obj_id):
-        return render(
+    def view_message_view(self, request, object_id):
+        message = self.get_object(request, object_id)
+        if message is None:
+            return self._get_obj_does_not_exist_redirect(
+                request, self.model._meta, object_id
+            )
+        if not self.has_view_or_change_permission(request, message):
+            raise PermissionDenied
+
+        # Finished messages never change, so browsers may re-use their copy
+        # of the viewer, and the rendered message is cached.
+        immutable = message.status in RETAINED_STATUSES
+        if immutable:
+            last_modified = int(
+                (message.sent_at or message.created_at).timestamp()
+            )
+            etag = '"%i-%i-%i-%i"' % (
+                message.pk, message.status, last_modified, request.user.pk
+            )
+            response = get_conditional_response(
+                request, etag=etag, last_modified=last_modified
+            )
+            if response is not None:
+                return response
+
+        response = render(
             request=request,
             template_name="message_viewer.html",
             context={
-                "message": self.get_object(request, obj_id),
+                "message": message,
+                "message_content": self.render_message_content(
+                    message, cache=immutable
+                ),
                 "opts": self.model._meta
             },
             content_type="text/html",
         )
+        if immutable:
+            response.headers["ETag"] = etag
+            response.headers["Last-Modified"] = http_date(last_modified)
+            patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    def render_message_content(self, message, cache=False):
+        key = "mailer:viewer:%i:%i" % (message.pk, message.status)
+        viewer_cache = caches[VIEWER_CACHE]
+        if cache:
+            content = viewer_cache.get(key)
+            if content is not None:
+                return mark_safe(content)
+
+        content = render_to_string(
+            template_name="message_viewer_content.html",
+            context={
+                "message": message,
+                "cc_addresses": message.cc_addresses,
+            },
+        )
+        if cache:
+            viewer_cache.set(key, str(content), VIEWER_CACHE_TIMEOUT)
+        return content
 
     def has_add_permission(self, request):
         return False
@@ -122,20 +209,28 @@ class MailerMessageAdmin(admin.ModelAdmin):
         return False
 
     def cancel_all(self, request):
-        self.cancel_queued_messages(
+        queued = self.model.objects.filter(status=MailerMessageStatus.QUEUED)
+        start_job(
             request=request,
-            queryset=self.model.objects.filter(
-                status=MailerMessageStatus.QUEUED
-            )
+            description="Canceling all queued status e-mails.",
+            function=lambda progress: queued.update(
+                status=MailerMessageStatus.CANCELED
+            ),
+            result_message="%d queued status e-mails were canceled.",
         )
         return HttpResponseRedirect("..")
 
     def send_all(self, request):
-        self.send_queued_messages(
+        queued = self.model.objects.filter(status=MailerMessageStatus.QUEUED)
+        action, function = "sent", send_messages
+        if getattr(settings, "MAILER_SPOOL", False):
+            action, function = "spooled", spool_messages
+        start_job(
             request=request,
-            queryset=self.model.objects.filter(
-                status=MailerMessageStatus.QUEUED
-            )
+            description="Sending all queued status e-mails.",
+            function=partial(function, queued),
+            result_message=f"%d queued status e-mails were {action}.",
+            total=queued.count(),
         )
         return HttpResponseRedirect("..")
 
@@ -161,31 +256,12 @@ class MailerMessageAdmin(admin.ModelAdmin):
 
     @admin.action(description="Send selected queued Messages")
     def send_queued_messages(self, request, queryset):
-        sent = 0
-        queued = queryset.filter(status=MailerMessageStatus.QUEUED)
-
-        with get_connection() as connection:
-            for obj in queued:
-                email_msg = EmailMultiAlternatives(
-                    subject=obj.subject,
-                    body=obj.body,
-                    from_email=obj.from_address,
-                    reply_to=(obj.reply_to_address,),
-                    to=(obj.to_address,),
-                    cc=obj.cc_addresses,
-                    headers={
-                        "X-Mail-Software": "github.com/ericoc/djadmin",
-                        "X-Mail-Software-ID": obj.id,
-                        "X-Mail-Software-Item": obj.__repr__(),
-                    },
-                    connection=connection,
-                )
-                email_msg.content_subtype = "html"
-                if email_msg.send():
-                    obj.sent_at = now()
-                    obj.status = MailerMessageStatus.SENT
-                    obj.save()
-                    sent += 1
+        action = "sent"
+        if getattr(settings, "MAILER_SPOOL", False):
+            action = "spooled"
+            sent = spool_messages(queryset)
+        else:
+            sent = send_messages(queryset)
 
         level = messages.WARNING
         if sent > 0:
@@ -194,11 +270,61 @@ class MailerMessageAdmin(admin.ModelAdmin):
         self.message_user(
             request=request,
             message=ngettext(
-                singular=f"%d queued status e-mail was sent.",
-                plural=f"%d queued status e-mails were sent.",
+                singular=f"%d queued status e-mail was {action}.",
+                plural=f"%d queued status e-mails were {action}.",
                 number=sent,
             ) % sent,
             level=level,
         )
 
-    actions = (cancel_queued_messages, send_queued_messages,)
+    def has_purge_permission(self, request):
+        return request.user.has_perm(
+            "%s.delete_%s" % (
+                self.model._meta.app_label, self.model._meta.model_name
+            )
+        )
+
+    @admin.action(
+        description=(
+            "Purge selected finished Messages past the retention period"
+        ),
+        permissions=("purge",),
+    )
+    def purge_finished_messages(self, request, queryset):
+        purged = purge_messages(
+            queryset.filter(created_at__lt=retention_cutoff(PURGE_DAYS)),
+            pause=0,
+        )
+
+        level = messages.WARNING
+        if purged > 0:
+            level = messages.SUCCESS
+
+        self.message_user(
+            request=request,
+            message=ngettext(
+                singular=(
+                    "%d finished status e-mail past the retention period"
+                    " was purged."
+                ),
+                plural=(
+                    "%d finished status e-mails past the retention period"
+                    " were purged."
+                ),
+                number=purged,
+            ) % purged,
+            level=level,
+        )
+
+    @admin.action(description="Export selected Messages as CSV")
+    def export_csv(self, request, queryset):
+        return export_response(request, queryset, format="csv")
+
+    @admin.action(description="Export selected Messages as JSONL")
+    def export_jsonl(self, request, queryset):
+        return export_response(request, queryset, format="jsonl")
+
+    actions = (
+        cancel_queued_messages, send_queued_messages, purge_finished_messages,
+        export_csv, export_jsonl,
+    )
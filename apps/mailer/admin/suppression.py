@@ -0,0 +1,59 @@
+from django import forms
+from django.contrib import admin
+
+from ..models.suppression import MailerSuppression
+from ..suppression import hash_address
+
+
+class MailerSuppressionForm(forms.ModelForm):
+    address = forms.EmailField(
+        help_text="E-mail address to suppress, stored as its hash only.",
+        label="E-mail Address",
+    )
+
+    class Meta:
+        model = MailerSuppression
+        fields = ("address", "reason")
+
+    def clean_address(self):
+        address_hash = hash_address(self.cleaned_data["address"])
+        suppressions = MailerSuppression.objects.filter(
+            address_hash=address_hash
+        )
+        if suppressions.exists():
+            raise forms.ValidationError("This address is suppressed already.")
+        return self.cleaned_data["address"]
+
+    def save(self, commit=True):
+        self.instance.address_hash = hash_address(self.cleaned_data["address"])
+        return super().save(commit=commit)
+
+
+@admin.register(MailerSuppression)
+class MailerSuppressionAdmin(admin.ModelAdmin):
+    """Suppressed address administration."""
+    model = MailerSuppression
+    add_form = MailerSuppressionForm
+    date_hierarchy = "created_at"
+    list_display = ("address_hash", "reason", "created_at")
+    list_filter = ("reason", "created_at")
+    readonly_fields = ("address_hash", "created_at")
+    search_fields = ("address_hash",)
+    search_help_text = "Search by e-mail address."
+    show_facets = admin.ShowFacets.ALLOW
+    show_full_result_count = False
+
+    def get_form(self, request, obj=None, **kwargs):
+        if obj is None:
+            kwargs["form"] = self.add_form
+        return super().get_form(request, obj, **kwargs)
+
+    def get_fields(self, request, obj=None):
+        if obj is None:
+            return ("address", "reason")
+        return ("address_hash", "reason", "created_at")
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term.strip():
+            return queryset, False
+        return queryset.filter(address_hash=hash_address(search_term)), False
@@ -5,6 +5,7 @@ from django.utils.timezone import now
 from django.utils.translation import ngettext
 
 from ..models.template import MailerTemplate
+from ..rendering import rerender_messages
 
 
 @admin.register(MailerTemplate)
@@ -17,11 +18,12 @@ class MailerTemplateAdmin(admin.ModelAdmin):
             "from_email", "from_name", "reply_to_email", "reply_to_name"
         )}),
         ("Message", {"fields": ("subject", "body",)}),
+        ("Digest", {"fields": ("digest", "digest_window")}),
     )
     list_display = (
         "name", "active", "subject", "from_address", "reply_to_address"
     )
-    list_filter = ("active", "from_email", "reply_to_email")
+    list_filter = ("active", "digest", "from_email", "reply_to_email")
     readonly_fields = ("from_address", "reply_to_address")
     save_as = True
     save_on_top = True
@@ -107,7 +109,29 @@ class MailerTemplateAdmin(admin.ModelAdmin):
             messages.WARNING,
         )
 
-    actions = (activate, deactivate,)
+    @admin.action(
+        description="Re-render queued Messages of selected Templates"
+    )
+    def rerender_queued_messages(self, request, queryset):
+        rendered = 0
+        for template in queryset:
+            rendered += rerender_messages(template)
+
+        level = messages.WARNING
+        if rendered > 0:
+            level = messages.SUCCESS
+
+        self.message_user(
+            request=request,
+            message=ngettext(
+                singular="%d queued status e-mail was re-rendered.",
+                plural="%d queued status e-mails were re-rendered.",
+                number=rendered,
+            ) % rendered,
+            level=level,
+        )
+
+    actions = (activate, deactivate, rerender_queued_messages,)
 
     def save_model(self, request, obj, form, change):
         if change:
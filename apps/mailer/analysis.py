@@ -0,0 +1,123 @@
+from functools import lru_cache
+
+from django.conf import settings
+from django.template import Template
+from django.template.base import FilterExpression, Node, NodeList, Variable
+from django.template.defaulttags import DebugNode
+from django.template.loader_tags import BlockNode
+from django.template.smartif import TokenBase
+
+
+ANALYSIS_CACHE_SIZE = getattr(settings, "MAILER_ANALYSIS_CACHE_SIZE", 512)
+
+# Nodes from these modules only look up the variables they were parsed with.
+ANALYZED_MODULES = (
+    "django.template.base",
+    "django.template.defaulttags",
+    "django.template.library",
+)
+
+
+class Unanalyzable(Exception):
+    """A template may look up any name in its context."""
+
+
+def _visit(obj, names, seen):
+    if id(obj) in seen:
+        return
+    seen.add(id(obj))
+
+    if isinstance(obj, (NodeList, list, tuple)):
+        for item in obj:
+            _visit(item, names, seen)
+    elif isinstance(obj, dict):
+        for item in obj.values():
+            _visit(item, names, seen)
+    elif isinstance(obj, FilterExpression):
+        _visit(obj.var, names, seen)
+        for _, args in obj.filters:
+            for _, arg in args:
+                _visit(arg, names, seen)
+    elif isinstance(obj, Variable):
+        if obj.lookups:
+            names.add(obj.lookups[0])
+    elif isinstance(obj, TokenBase):
+        for attr in ("first", "second", "value"):
+            _visit(getattr(obj, attr, None), names, seen)
+    elif isinstance(obj, Node):
+        if (
+            obj.__class__.__module__ not in ANALYZED_MODULES
+            and not isinstance(obj, BlockNode)
+        ) or isinstance(obj, DebugNode) or getattr(obj, "takes_context", False):
+            raise Unanalyzable(obj.__class__.__name__)
+        for attr, value in vars(obj).items():
+            if attr not in ("origin", "token"):
+                _visit(value, names, seen)
+
+
+def node_references(node):
+    """
+    Names that a template node, or node list, looks up in its context.
+
+    Returns None when that cannot be determined, such as for templates using
+    "{% include %}", "{% debug %}", or tags that are passed the context.
+    """
+    names = set()
+    try:
+        _visit(node, names, set())
+    except Unanalyzable:
+        return None
+    return frozenset(names)
+
+
+def template_references(template):
+    """Names that a compiled template looks up in its context."""
+    return node_references(template.nodelist)
+
+
+def bound_names(template):
+    """Names that tags of a compiled template set in its context."""
+    names = set()
+    for node in template.nodelist.get_nodes_by_type(Node):
+        for attr in ("asvar", "target_var", "var_name", "variable_name"):
+            if getattr(node, attr, None):
+                names.add(getattr(node, attr))
+    return frozenset(names)
+
+
+@lru_cache(maxsize=ANALYSIS_CACHE_SIZE)
+def source_references(source):
+    """Names that template source code looks up in its context."""
+    return template_references(Template(source))
+
+
+@lru_cache(maxsize=ANALYSIS_CACHE_SIZE)
+def required_variables(sources, variables):
+    """
+    Names of the variables needed to render template sources.
+
+    Variables are (name, value) pairs, rendered in order, each able to use
+    those before it. The names returned include the variables needed by other
+    needed variables, or are None when every variable may be needed.
+    """
+    needed = set()
+    names = {name for name, _ in variables}
+    for source in sources:
+        references = source_references(source)
+        if references is None:
+            return None
+        needed |= references & names
+
+    required = set()
+    for index in reversed(range(len(variables))):
+        name, value = variables[index]
+        if name not in needed:
+            continue
+        required.add(name)
+        earlier = {earlier_name for earlier_name, _ in variables[:index]}
+        references = source_references(value)
+        if references is None:
+            needed |= earlier
+        else:
+            needed |= references & earlier
+    return frozenset(required)
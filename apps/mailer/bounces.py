@@ -0,0 +1,226 @@
+import os
+import re
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from email.parser import BytesParser, HeaderParser
+from email.policy import compat32
+from itertools import islice
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connections, transaction
+
+from .models.archive import MailerArchivedMessage
+from .models.message import MailerMessage
+from .models.status import MailerMessageStatus
+from .models.suppression import MailerSuppressionReason
+from .suppression import import_suppressions
+
+
+BOUNCE_BATCH_SIZE = getattr(settings, "MAILER_BOUNCE_BATCH_SIZE", 1000)
+BOUNCE_WORKERS = getattr(settings, "MAILER_BOUNCE_WORKERS", None)
+
+# "Message-ID" headers made by make_message_id(), starting with the message ID.
+MESSAGE_ID_RE = re.compile(r"<(\d+)\.\d+\.mailer@")
+SOFTWARE_ID_RE = re.compile(rb"^X-Mail-Software-ID:\s*(\d+)", re.I | re.M)
+
+
+def _original_headers(report):
+    """Headers of the original message, returned with a delivery report."""
+    for part in report.walk():
+        content_type = part.get_content_type()
+        if content_type == "message/rfc822":
+            payload = part.get_payload()
+            if payload:
+                return payload[0]
+        elif content_type == "text/rfc822-headers":
+            return HeaderParser().parsestr(
+                part.get_payload(decode=True).decode("utf-8", "replace")
+            )
+    return None
+
+
+def parse_bounce(data):
+    """
+    Parse a delivery status notification (RFC 3464) from its bytes.
+
+    Returns the ID of the bounced mailer message, or None if unknown or if
+    delivery failed for no recipient (delays, and reports of delivery or
+    relaying, bounce nothing), and the recipients whose delivery failed
+    permanently, or None when the message is no delivery status
+    notification at all. Runs in worker processes, so takes and returns
+    only plain values.
+    """
+    report = BytesParser(policy=compat32).parsebytes(data)
+    if report.get_content_type() != "multipart/report":
+        return None, None
+    if report.get_param("report-type", "").lower() != "delivery-status":
+        return None, None
+
+    bounced = False
+    failed = []
+    for part in report.walk():
+        if part.get_content_type() != "message/delivery-status":
+            continue
+        # Per-message fields come first, then those of each recipient.
+        for fields in part.get_payload()[1:]:
+            action = (fields.get("Action") or "").strip().lower()
+            status = (fields.get("Status") or "").strip()
+            recipient = fields.get("Final-Recipient") or ""
+            if action != "failed":
+                continue
+            bounced = True
+            if status.startswith("5"):
+                address = recipient.partition(";")[2].strip().strip("<>")
+                if address:
+                    failed.append(address)
+
+    if not bounced:
+        return None, failed
+
+    message_id = None
+    headers = _original_headers(report)
+    if headers is not None:
+        software_id = (headers.get("X-Mail-Software-ID") or "").strip()
+        if software_id.isdigit():
+            message_id = int(software_id)
+        elif match := MESSAGE_ID_RE.search(headers.get("Message-ID") or ""):
+            message_id = int(match.group(1))
+    if message_id is None:
+        if match := SOFTWARE_ID_RE.search(data):
+            message_id = int(match.group(1))
+    return message_id, failed
+
+
+def read_maildir(directory):
+    """
+    Read new messages of a maildir, as (done, bytes) pairs.
+
+    Calling done() moves a message, and those read before it, to "cur/",
+    marked as seen, so that they are not read again.
+    """
+    new = Path(directory, "new")
+    cur = Path(directory, "cur")
+    cur.mkdir(exist_ok=True)
+    pending = deque()
+
+    def done(last):
+        while pending and pending[0][0] <= last:
+            _, path = pending.popleft()
+            path.rename(Path(cur, path.name + ":2,S"))
+
+    with os.scandir(new) as entries:
+        for index, entry in enumerate(entries):
+            if not entry.is_file():
+                continue
+            path = Path(entry.path)
+            try:
+                data = path.read_bytes()
+            except FileNotFoundError:
+                continue  # Read by another process.
+            pending.append((index, path))
+            yield (lambda last=index: done(last)), data
+
+
+def read_mbox(path):
+    """
+    Read messages of an mbox file, past its checkpoint, as (done, bytes).
+
+    The checkpoint is the offset of the first unread message, kept in a
+    ".offset" file next to the mbox. Calling done() moves it past a
+    message, and those read before it, replacing the file at once so that
+    a crash never leaves it partly written. A file smaller than its
+    checkpoint, such as a new file after rotation, is read from the start.
+    """
+    path = Path(path)
+    checkpoint = Path(path.parent, path.name + ".offset")
+    offset = 0
+    if checkpoint.exists():
+        offset = int(checkpoint.read_text() or 0)
+    if offset > path.stat().st_size:
+        offset = 0
+
+    def done(end):
+        temp = Path(path.parent, checkpoint.name + ".tmp")
+        temp.write_text(str(end))
+        os.replace(temp, checkpoint)
+
+    with open(path, "rb") as mbox:
+        mbox.seek(offset)
+        lines = []
+        position = offset
+        for line in mbox:
+            if line.startswith(b"From ") and lines:
+                data = b"".join(lines[1:])
+                yield (lambda end=position: done(end)), data
+                lines = []
+            lines.append(line)
+            position += len(line)
+        # The last message is complete once followed by an empty line, any
+        # other is still being written.
+        if lines and not lines[-1].strip():
+            yield (lambda end=position: done(end)), b"".join(lines[1:])
+
+
+def apply_bounces(results):
+    """
+    Mark bounced messages as failed, and suppress the failed recipients.
+
+    Messages are updated whether sent or archived since, in one update
+    each. Returns the numbers of messages failed and addresses suppressed.
+    """
+    message_ids = {message_id for message_id, _ in results if message_id}
+    addresses = {address for _, failed in results for address in failed}
+    with transaction.atomic():
+        failed = MailerMessage.objects.filter(
+            id__in=message_ids, status=MailerMessageStatus.SENT
+        ).update(status=MailerMessageStatus.FAILED)
+        failed += MailerArchivedMessage.objects.filter(
+            id__in=message_ids, status=MailerMessageStatus.SENT
+        ).update(status=MailerMessageStatus.FAILED)
+        suppressed = import_suppressions(
+            addresses, reason=MailerSuppressionReason.BOUNCED
+        )
+    return failed, suppressed
+
+
+def process_bounces(
+    messages,
+    batch_size=BOUNCE_BATCH_SIZE,
+    workers=BOUNCE_WORKERS,
+    progress=None
+):
+    """
+    Process delivery status notifications, as read by read_maildir() or
+    read_mbox(), in batches.
+
+    Each batch is parsed by a pool of worker processes, applied in one
+    transaction, then checkpointed once, past its last message, so that no
+    more than one batch is held in memory, and an interrupted run resumes
+    where it left off. Returns the numbers of notifications read, messages
+    failed, and addresses suppressed. After every batch, progress is called
+    with those numbers.
+    """
+    read = failed = suppressed = 0
+    # Forked workers must not inherit open database connections.
+    connections.close_all()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        while batch := list(islice(messages, batch_size)):
+            results = [
+                (message_id, addresses)
+                for message_id, addresses in executor.map(
+                    parse_bounce,
+                    [data for _, data in batch],
+                    chunksize=max(1, batch_size // 64),
+                )
+                if message_id is not None or addresses
+            ]
+            batch_failed, batch_suppressed = apply_bounces(results)
+            done, _ = batch[-1]
+            done()
+            read += len(batch)
+            failed += batch_failed
+            suppressed += batch_suppressed
+            if progress is not None:
+                progress(read, failed, suppressed)
+    return read, failed, suppressed
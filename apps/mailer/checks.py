@@ -0,0 +1,29 @@
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+from .jobs import JOB_CACHE
+
+
+# Cache backends that every process keeps to itself.
+PROCESS_CACHES = ("django.core.cache.backends.locmem.LocMemCache",)
+
+
+@register(Tags.caches)
+def check_job_cache(app_configs, **kwargs):
+    """
+    Jobs must be shared by every process, since the progress of a job is
+    followed from whichever process serves the next request.
+    """
+    backend = settings.CACHES.get(JOB_CACHE, {}).get("BACKEND")
+    if backend not in PROCESS_CACHES:
+        return []
+    return [
+        Error(
+            "MAILER_JOB_CACHE %r is local to each process." % JOB_CACHE,
+            hint=(
+                "Use a cache shared by all server processes, such as"
+                " FileBasedCache, DatabaseCache, or RedisCache."
+            ),
+            id="mailer.E001",
+        )
+    ]
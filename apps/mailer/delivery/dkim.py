@@ -0,0 +1,150 @@
+import os
+import re
+import time
+from base64 import b64encode
+from concurrent.futures import ProcessPoolExecutor
+from email.utils import getaddresses
+from functools import lru_cache
+from hashlib import sha256
+from pathlib import Path
+
+from django.conf import settings
+
+from .payload import BODY_CACHE_SIZE
+
+
+DKIM_KEYS = getattr(settings, "MAILER_DKIM_KEYS", {})
+DKIM_HEADERS = getattr(
+    settings,
+    "MAILER_DKIM_HEADERS",
+    (
+        "From", "Reply-To", "To", "Cc", "Subject", "Date", "Message-ID",
+        "MIME-Version", "Content-Type", "Content-Transfer-Encoding",
+    )
+)
+DKIM_WORKERS = getattr(settings, "MAILER_DKIM_WORKERS", None)
+
+WSP_RE = re.compile(rb"[ \t]+")
+TRAILING_WSP_RE = re.compile(rb"[ \t]+(?=\r\n)")
+FOLDING_RE = re.compile(rb"\r\n(?=[ \t])")
+
+
+@lru_cache(maxsize=None)
+def private_key(domain):
+    """
+    Selector and parsed private key for signing mail from a domain.
+
+    Keys are parsed once per process, and None is returned for domains
+    without a key in MAILER_DKIM_KEYS.
+    """
+    if domain not in DKIM_KEYS:
+        return None
+    from cryptography.hazmat.primitives.serialization import (
+        load_pem_private_key
+    )
+    selector, path = DKIM_KEYS[domain]
+    return selector, load_pem_private_key(
+        Path(path).read_bytes(), password=None
+    )
+
+
+@lru_cache(maxsize=BODY_CACHE_SIZE)
+def body_hash(body):
+    """
+    Base64 SHA-256 digest of a body, in "relaxed" canonical form.
+
+    Messages sharing a body, such as those rendered from one template
+    without any widget variables in the body, are hashed once.
+    """
+    body = WSP_RE.sub(b" ", body)
+    body = TRAILING_WSP_RE.sub(b"", body + b"\r\n").rstrip(b"\r\n")
+    if body:
+        body += b"\r\n"
+    return b64encode(sha256(body).digest()).decode()
+
+
+def canonical_header(field):
+    """A header field, without its line break, in "relaxed" canonical form."""
+    name, _, value = field.partition(b":")
+    value = WSP_RE.sub(b" ", FOLDING_RE.sub(b"", value)).strip()
+    return name.strip().lower() + b":" + value
+
+
+def split_headers(header):
+    """Split the header of a message into its fields, still folded."""
+    fields = []
+    for line in header.split(b"\r\n"):
+        if line[:1] in (b" ", b"\t") and fields:
+            fields[-1] += b"\r\n" + line
+        elif line:
+            fields.append(line)
+    return fields
+
+
+def sign_payload(payload):
+    """
+    Prepend a "DKIM-Signature" header to the MIME bytes of a message.
+
+    Signatures use "relaxed/relaxed" canonicalization and RSA-SHA256, with
+    the key of the "From" address domain. Payloads from domains without a
+    key are returned as they are.
+    """
+    header, separator, body = payload.partition(b"\r\n\r\n")
+    fields = split_headers(header)
+    by_name = {}
+    for field in fields:
+        by_name[field.partition(b":")[0].strip().lower().decode()] = field
+
+    from_field = by_name.get("from", b"").partition(b":")[2].decode()
+    addresses = getaddresses([from_field])
+    domain = addresses[0][1].rpartition("@")[2].lower() if addresses else ""
+    key = private_key(domain)
+    if key is None:
+        return payload
+    selector, private = key
+
+    from cryptography.hazmat.primitives.asymmetric.padding import PKCS1v15
+    from cryptography.hazmat.primitives.hashes import SHA256
+
+    signed = [
+        name.lower() for name in DKIM_HEADERS if name.lower() in by_name
+    ]
+    signature = (
+        "DKIM-Signature: v=1; a=rsa-sha256; c=relaxed/relaxed; d=%s; s=%s;"
+        " t=%i; h=%s; bh=%s; b=" % (
+            domain, selector, time.time(), ":".join(signed),
+            body_hash(body if separator else b"")
+        )
+    ).encode()
+    data = b"".join(
+        canonical_header(by_name[name]) + b"\r\n" for name in signed
+    ) + canonical_header(signature)
+    signature += b64encode(private.sign(data, PKCS1v15(), SHA256()))
+    return signature + b"\r\n" + payload
+
+
+@lru_cache(maxsize=None)
+def _executor():
+    return ProcessPoolExecutor(max_workers=DKIM_WORKERS)
+
+
+def sign_payloads(payloads):
+    """
+    Sign the MIME bytes of a batch of messages, if DKIM keys are set.
+
+    Signing is spread over a pool of MAILER_DKIM_WORKERS processes, kept
+    for the life of the sender, unless that is 0. Returns the payloads,
+    signed, in the same order.
+    """
+    if not DKIM_KEYS or not payloads:
+        return payloads
+    if DKIM_WORKERS == 0:
+        return [sign_payload(payload) for payload in payloads]
+    workers = DKIM_WORKERS or os.cpu_count() or 1
+    return list(
+        _executor().map(
+            sign_payload,
+            payloads,
+            chunksize=max(1, len(payloads) // (workers * 4))
+        )
+    )
@@ -0,0 +1,250 @@
+import time
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.core.mail import get_connection
+from django.core.mail.backends.smtp import EmailBackend as SMTPEmailBackend
+from django.db import transaction
+from django.utils.dateparse import parse_datetime
+from django.utils.timezone import now
+
+from .dkim import sign_payloads
+from .journal import Journal, read_journal
+from .notify import notify_queued
+from .payload import (
+    build_message, envelope, get_payload, keep_payloads, make_message_id,
+    payload_key
+)
+from .records import fetch_records, update_records
+from ..models.message import MailerMessage
+from ..models.status import MailerMessageStatus
+from ..suppression import suppress_records
+
+
+SEND_BATCH_SIZE = getattr(settings, "MAILER_SEND_BATCH_SIZE", 500)
+SEND_LEASE = getattr(settings, "MAILER_SEND_LEASE", 600)
+JOURNAL_DIR = getattr(
+    settings, "MAILER_JOURNAL_DIR", Path(settings.MEDIA_ROOT, "journal")
+)
+
+
+def deliver(connection, email_msg):
+    """
+    Hand a message off to the mail server.
+
+    SMTP connections are given the MIME payload of the message directly,
+    other e-mail backends send the message themselves.
+    """
+    if not email_msg.recipients():
+        return False
+    if isinstance(connection, SMTPEmailBackend) and connection.connection:
+        from_email, recipients = envelope(email_msg)
+        connection.connection.sendmail(
+            from_email, recipients, email_msg.payload
+        )
+        return True
+    return bool(connection.send_messages([email_msg]))
+
+
+def claim_messages(queryset, batch_size=SEND_BATCH_SIZE):
+    """
+    Claim a batch of queued messages to be sent, as delivery records.
+
+    Claimed messages are marked as sending, with their "Message-ID" and the
+    time their claim expires, in a single bulk update.
+    """
+    with transaction.atomic():
+        batch = fetch_records(
+            queryset.filter(
+                status=MailerMessageStatus.QUEUED
+            ).select_for_update(skip_locked=True).order_by("id")[:batch_size]
+        )
+        lease_expires_at = now() + timedelta(seconds=SEND_LEASE)
+        for record in batch:
+            record.status = MailerMessageStatus.SENDING
+            record.message_id = make_message_id(record)
+            record.lease_expires_at = lease_expires_at
+        update_records(
+            batch, fields=("status", "message_id", "lease_expires_at")
+        )
+    return batch
+
+
+def renew_lease(batch, lease_expires_at):
+    """
+    Extend the claim on a batch, until lease_expires_at, by another SEND_LEASE.
+
+    Sent messages, which are only committed at the end of the batch, are
+    renewed along with the rest. Returns False if the claim on any of them
+    was lost, having expired and been recovered, after which the rest of
+    the batch should not be sent.
+    """
+    claimed = [
+        record for record in batch
+        if record.status != MailerMessageStatus.SUPPRESSED
+    ]
+    renewed_until = now() + timedelta(seconds=SEND_LEASE)
+    renewed = MailerMessage.objects.filter(
+        id__in=[record.id for record in claimed],
+        status=MailerMessageStatus.SENDING,
+        lease_expires_at=lease_expires_at,
+    ).update(lease_expires_at=renewed_until)
+    for record in claimed:
+        record.lease_expires_at = renewed_until
+    return renewed == len(claimed)
+
+
+def commit_messages(batch):
+    """
+    Record the results of a batch, returning unsent messages to queue.
+
+    Messages are only updated while still claimed by the batch, as told by
+    their lease, not once recovered and possibly claimed by another sender.
+    """
+    finished = (MailerMessageStatus.SENT, MailerMessageStatus.SUPPRESSED)
+    done = [record for record in batch if record.status in finished]
+    unsent = [record for record in batch if record.status not in finished]
+    claimed = MailerMessage.objects.filter(
+        status=MailerMessageStatus.SENDING,
+        lease_expires_at__in={record.lease_expires_at for record in batch},
+    )
+    for record in done:
+        record.lease_expires_at = None
+    with transaction.atomic():
+        update_records(
+            done,
+            fields=("status", "sent_at", "lease_expires_at"),
+            queryset=claimed,
+        )
+        claimed.filter(id__in=[record.id for record in unsent]).update(
+            status=MailerMessageStatus.QUEUED, lease_expires_at=None
+        )
+
+
+def send_messages(queryset, batch_size=SEND_BATCH_SIZE, progress=None):
+    """
+    Send queued messages, returning the number of messages sent.
+
+    Messages are claimed, sent, and committed in batches. Every batch is
+    journaled once claimed, and every hand-off to the mail server is
+    journaled, and synced to disk, before it starts, so that messages left
+    sending by a crash can be reconciled by recover_messages() rather than
+    sent again.
+    Claims are renewed while a batch is sent, and a batch whose claim was
+    lost anyway stops.
+    Messages to suppressed addresses are marked as such, and not sent.
+    The others are DKIM signed a batch at a time, before being sent, and
+    those attempted but not sent are cached for their retries. After
+    every batch, progress is called with the number of messages done.
+    """
+    sent = 0
+    done = 0
+    last_id = 0
+
+    with Journal(JOURNAL_DIR) as journal, get_connection() as connection:
+        while batch := claim_messages(
+            queryset.filter(id__gt=last_id), batch_size
+        ):
+            last_id = batch[-1].pk
+            unsent = {}
+            try:
+                # Claimed, but not yet handed off.
+                for obj in batch:
+                    journal.write(obj.pk, MailerMessageStatus.QUEUED)
+                journal.sync()
+                suppress_records(batch)
+                messages = []
+                for obj in batch:
+                    if obj.status == MailerMessageStatus.SUPPRESSED:
+                        continue
+                    email_msg = build_message(obj, connection=connection)
+                    key = payload_key(email_msg, obj)
+                    email_msg.payload = get_payload(email_msg, key)
+                    messages.append((obj, email_msg, key))
+                payloads = sign_payloads(
+                    [email_msg.payload for _, email_msg, _ in messages]
+                )
+                for index, payload in enumerate(payloads):
+                    obj, email_msg, key = messages[index]
+                    # Renew the claim halfway through, so that it never
+                    # expires while the batch is still being sent.
+                    renew_at = obj.lease_expires_at - timedelta(
+                        seconds=SEND_LEASE / 2
+                    )
+                    if now() >= renew_at and not renew_lease(
+                        batch, obj.lease_expires_at
+                    ):
+                        break
+                    # Kept unsigned, to be signed again when retried.
+                    unsent[key] = email_msg.payload
+                    email_msg.payload = payload
+                    journal.write(obj.pk, MailerMessageStatus.SENDING)
+                    journal.sync()
+                    if deliver(connection, email_msg):
+                        obj.sent_at = now()
+                        obj.status = MailerMessageStatus.SENT
+                        journal.write(obj.pk, obj.status, obj.sent_at)
+                        del unsent[key]
+                        sent += 1
+            finally:
+                keep_payloads(unsent)
+                commit_messages(batch)
+                journal.discard()
+            done += len(batch)
+            if progress is not None:
+                progress(done)
+
+    return sent
+
+
+def recover_messages(lease=SEND_LEASE):
+    """
+    Reconcile messages left sending by a crashed worker, without resending.
+
+    Returns the number of messages recovered. According to the journal,
+    messages accepted by the mail server are marked as sent, messages never
+    handed off are queued again, and messages whose hand-off never finished
+    are marked as failed, to be checked and queued again by hand. So are
+    messages missing from the journal altogether, which may have been
+    handed off all the same: JOURNAL_DIR must be shared by every host that
+    sends mail, or recovers it.
+    """
+    paths = []
+    if Path(JOURNAL_DIR).is_dir():
+        paths = [
+            path for path in Path(JOURNAL_DIR).iterdir()
+            if path.suffix in (".open", ".jsonl")
+        ]
+    expired = time.time() - lease
+    results = read_journal(paths)
+
+    with transaction.atomic():
+        batch = list(
+            MailerMessage.objects.filter(
+                status=MailerMessageStatus.SENDING,
+                lease_expires_at__lt=now()
+            ).select_for_update(skip_locked=True)
+        )
+        for obj in batch:
+            entry = results.get(obj.pk)
+            if entry is None:
+                obj.status = MailerMessageStatus.FAILED
+            elif entry["status"] == MailerMessageStatus.QUEUED:
+                obj.status = MailerMessageStatus.QUEUED
+            elif entry["status"] == MailerMessageStatus.SENT:
+                obj.status = MailerMessageStatus.SENT
+                obj.sent_at = parse_datetime(entry["at"])
+            else:
+                obj.status = MailerMessageStatus.FAILED
+            obj.lease_expires_at = None
+        MailerMessage.objects.bulk_update(
+            batch, fields=("status", "sent_at", "lease_expires_at")
+        )
+        if any(obj.status == MailerMessageStatus.QUEUED for obj in batch):
+            notify_queued()
+
+    for path in paths:
+        if path.stat().st_mtime < expired:
+            path.unlink(missing_ok=True)
+    return len(batch)
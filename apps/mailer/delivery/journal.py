@@ -0,0 +1,132 @@
+import json
+import os
+import socket
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.dateparse import parse_datetime
+from django.utils.timezone import now
+
+from ..models.message import MailerMessage
+from ..models.status import MailerMessageStatus
+
+
+JOURNAL_ROTATE = getattr(settings, "MAILER_JOURNAL_ROTATE", 10000)
+JOURNAL_BATCH_SIZE = getattr(settings, "MAILER_JOURNAL_BATCH_SIZE", 1000)
+
+
+class Journal:
+    """
+    Append-only log of delivery results, kept outside of the database.
+
+    Results are written to "<host>.<pid>.<time>.open" files, which are renamed
+    to ".jsonl" once closed (or rotated) and then applied to the messages
+    table in bulk by apply_journals(). Entries are only certain to survive a
+    crash of the host once synced.
+    """
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._file = None
+        self._path = None
+        self._written = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def open(self):
+        self._path = Path(
+            self.directory,
+            "%s.%i.%i.open" % (socket.gethostname(), os.getpid(), time.time_ns())
+        )
+        self._file = open(self._path, "a", buffering=1, encoding="utf-8")
+        self._written = 0
+        # Make the new file itself durable, not just what is written to it.
+        directory = os.open(self.directory, os.O_RDONLY)
+        try:
+            os.fsync(directory)
+        finally:
+            os.close(directory)
+
+    def close(self):
+        if self._file is None:
+            return
+        self.sync()
+        self._file.close()
+        if self._written:
+            self._path.rename(self._path.with_suffix(".jsonl"))
+        else:
+            self._path.unlink()
+        self._file = None
+
+    def discard(self):
+        """Remove the current journal file, once its results are committed."""
+        if self._file is None:
+            return
+        self._file.close()
+        self._path.unlink()
+        self._file = None
+
+    def write(self, message_id, status, at=None):
+        """Record the delivery status of a message."""
+        if self._file is None:
+            self.open()
+        self._file.write(json.dumps({
+            "id": message_id,
+            "status": int(status),
+            "at": (at or now()).isoformat(),
+        }) + "\n")
+        self._written += 1
+        if self._written >= JOURNAL_ROTATE:
+            self.close()
+
+    def sync(self):
+        """Flush entries written so far to disk, before acting on them."""
+        if self._file is None:
+            return
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+
+def read_journal(paths):
+    """Read journal files, returning the latest entry of each message."""
+    results = {}
+    for path in paths:
+        with open(path, encoding="utf-8") as journal:
+            for line in journal:
+                if line.strip():
+                    entry = json.loads(line)
+                    results[entry["id"]] = entry
+    return results
+
+
+def apply_journals(directory, batch_size=JOURNAL_BATCH_SIZE):
+    """
+    Apply closed journal files to the messages table, in bulk.
+
+    Returns the number of messages updated.
+    """
+    applied = 0
+    for path in sorted(Path(directory).glob("*.jsonl")):
+        results = read_journal((path,))
+
+        objs = []
+        for entry in results.values():
+            obj = MailerMessage(id=entry["id"], status=entry["status"])
+            if entry["status"] == MailerMessageStatus.SENT:
+                obj.sent_at = parse_datetime(entry["at"])
+            objs.append(obj)
+
+        with transaction.atomic():
+            MailerMessage.objects.bulk_update(
+                objs, fields=("status", "sent_at"), batch_size=batch_size
+            )
+        path.unlink()
+        applied += len(objs)
+    return applied
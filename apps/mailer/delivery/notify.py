@@ -0,0 +1,79 @@
+import time
+from functools import partial
+
+from django.conf import settings
+from django.db import connections, transaction
+
+
+NOTIFY_CHANNEL = getattr(settings, "MAILER_NOTIFY_CHANNEL", "mailer_queued")
+WORKER_POLL = getattr(settings, "MAILER_WORKER_POLL", 60)
+
+# One callback per database, so that a transaction queues it only once.
+_notifiers = {}
+
+
+def _notify(using):
+    with connections[using].cursor() as cursor:
+        cursor.execute("SELECT pg_notify(%s, '')", [NOTIFY_CHANNEL])
+
+
+def notify_queued(using="default"):
+    """
+    Wake delivery workers once the current transaction commits.
+
+    However many messages a transaction queues, workers are notified once,
+    and not at all if it rolls back. Only PostgreSQL databases notify.
+    """
+    connection = connections[using]
+    if connection.vendor != "postgresql":
+        return
+    notifier = _notifiers.setdefault(using, partial(_notify, using))
+    if any(func is notifier for _, func, _ in connection.run_on_commit):
+        return
+    transaction.on_commit(notifier, using=using)
+
+
+class QueueListener:
+    """
+    Wait for messages to be queued, on a connection of its own.
+
+    Listening starts when the listener is opened, so that messages queued
+    while a worker is busy sending still wake it up afterwards. Databases
+    other than PostgreSQL are polled instead.
+    """
+
+    def __init__(self, using="default"):
+        self.using = using
+        self.connection = None
+
+    def __enter__(self):
+        wrapper = connections[self.using]
+        if wrapper.vendor == "postgresql":
+            import psycopg
+            from psycopg import sql
+
+            self.connection = psycopg.connect(
+                **wrapper.get_connection_params(), autocommit=True
+            )
+            self.connection.execute(
+                sql.SQL("LISTEN {}").format(sql.Identifier(NOTIFY_CHANNEL))
+            )
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+    def wait(self, timeout):
+        """Wait up to timeout seconds, returning whether anything was queued."""
+        if self.connection is None:
+            time.sleep(timeout)
+            return False
+        woken = False
+        for _ in self.connection.notifies(timeout=timeout, stop_after=1):
+            woken = True
+        # Notifications that arrived together are handled together.
+        for _ in self.connection.notifies(timeout=0):
+            pass
+        return woken
@@ -0,0 +1,148 @@
+from copy import deepcopy
+from email import message_from_bytes
+from email.parser import BytesHeaderParser
+from email.utils import getaddresses
+from functools import lru_cache
+from hashlib import sha256
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.mail import EmailMultiAlternatives
+from django.core.mail.message import SafeMIMEText, sanitize_address
+
+
+PAYLOAD_CACHE = getattr(settings, "MAILER_PAYLOAD_CACHE", "default")
+PAYLOAD_CACHE_TIMEOUT = getattr(settings, "MAILER_PAYLOAD_CACHE_TIMEOUT", 3600)
+BODY_CACHE_SIZE = getattr(settings, "MAILER_BODY_CACHE_SIZE", 128)
+MESSAGE_ID_DOMAIN = getattr(
+    settings,
+    "MAILER_MESSAGE_ID_DOMAIN",
+    settings.DEFAULT_FROM_EMAIL.rpartition("@")[2]
+)
+
+
+@lru_cache(maxsize=BODY_CACHE_SIZE)
+def _body_part(body, subtype, encoding):
+    """Encode a message body once, for all messages sharing that body."""
+    return SafeMIMEText(body, subtype, encoding)
+
+
+class MailerEmailMessage(EmailMultiAlternatives):
+    """
+    HTML e-mail message re-using the encoded body part of identical bodies.
+
+    Messages with a pre-built MIME payload are sent exactly as those bytes.
+    """
+    content_subtype = "html"
+    payload = None
+
+    @classmethod
+    def from_payload(cls, payload, connection=None):
+        """Create a message from its MIME bytes, such as a spooled file."""
+        headers = BytesHeaderParser().parsebytes(payload)
+        email_msg = cls(
+            from_email=headers["From"],
+            to=[addr for _, addr in getaddresses(headers.get_all("To", []))],
+            cc=[addr for _, addr in getaddresses(headers.get_all("Cc", []))],
+            connection=connection,
+        )
+        email_msg.payload = payload
+        return email_msg
+
+    def message(self):
+        if self.payload is not None:
+            return message_from_bytes(self.payload)
+        # Keep Django from encoding the body, _create_message() swaps it in.
+        self._body, self.body = self.body, ""
+        try:
+            return super().message()
+        finally:
+            self.body = self._body
+
+    def _create_message(self, msg):
+        encoding = self.encoding or settings.DEFAULT_CHARSET
+        msg = deepcopy(_body_part(self._body, self.content_subtype, encoding))
+        return super()._create_message(msg)
+
+
+def make_message_id(obj):
+    """
+    Deterministic "Message-ID" header of a mailer message.
+
+    Every attempt to send a message uses the same "Message-ID", so that the
+    message can be recognized after a crash, rather than sent again.
+    """
+    return "<%i.%i.mailer@%s>" % (
+        obj.pk, obj.created_at.timestamp(), MESSAGE_ID_DOMAIN
+    )
+
+
+def build_message(obj, connection=None):
+    """Build the e-mail message for a mailer message."""
+    return MailerEmailMessage(
+        subject=obj.subject,
+        body=obj.body,
+        from_email=obj.from_address,
+        reply_to=(obj.reply_to_address,),
+        to=(obj.to_address,),
+        cc=obj.cc_addresses,
+        headers={
+            "Message-ID": obj.message_id or make_message_id(obj),
+            "X-Mail-Software": "github.com/ericoc/djadmin",
+            "X-Mail-Software-ID": obj.id,
+            "X-Mail-Software-Item": obj.__repr__(),
+        },
+        connection=connection,
+    )
+
+
+def build_payload(email_msg):
+    """Build the MIME bytes of a message, as sent over SMTP."""
+    return email_msg.message().as_bytes(linesep="\r\n")
+
+
+def payload_key(email_msg, obj):
+    """Cache key of a message payload, changing along with its contents."""
+    digest = sha256()
+    for value in (
+        email_msg.subject, email_msg.from_email, *email_msg.reply_to,
+        *email_msg.to, *email_msg.cc, email_msg.body
+    ):
+        digest.update(str(value).encode())
+        digest.update(b"\0")
+    return "mailer:payload:%i:%s" % (obj.pk, digest.hexdigest())
+
+
+def get_payload(email_msg, key):
+    """
+    Get the MIME bytes of a message, as kept by keep_payloads(), or build
+    them.
+
+    Retries of the same message re-use the kept bytes, including the "Date"
+    and "Message-ID" headers from the first attempt.
+    """
+    payload = caches[PAYLOAD_CACHE].get(key)
+    if payload is None:
+        payload = build_payload(email_msg)
+    return payload
+
+
+def keep_payloads(payloads):
+    """
+    Cache the MIME bytes of messages that were attempted, but not sent, by
+    their payload_key(), for their retries.
+
+    Messages sent at the first attempt, nearly all of them, are never
+    cached, so that large sends do not churn the cache.
+    """
+    if payloads:
+        caches[PAYLOAD_CACHE].set_many(payloads, PAYLOAD_CACHE_TIMEOUT)
+
+
+def envelope(email_msg):
+    """Get the SMTP envelope sender and recipients of a message."""
+    encoding = email_msg.encoding or settings.DEFAULT_CHARSET
+    return (
+        sanitize_address(email_msg.from_email, encoding),
+        [sanitize_address(addr, encoding) for addr in email_msg.recipients()]
+    )
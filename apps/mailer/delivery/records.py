@@ -0,0 +1,93 @@
+from ..models.message import MailerMessage
+from ..models.recipient import MailerRecipient
+
+
+class DeliveryRecord:
+    """
+    Just what it takes to send a message, without a model instance.
+
+    Records are read in batches with values_list() and have the attributes
+    of MailerMessage used to build e-mail, so that they can stand in for
+    messages in the delivery engine.
+    """
+    __slots__ = (
+        "id", "created_at", "subject", "body",
+        "from_name", "from_email", "reply_to_name", "reply_to_email",
+        "to_name", "to_email", "message_id", "status", "sent_at",
+        "lease_expires_at", "cc_addresses",
+    )
+    fields = __slots__[:-1]
+
+    def __init__(self, *values):
+        for name, value in zip(self.fields, values):
+            setattr(self, name, value)
+        self.cc_addresses = []
+
+    def __repr__(self):
+        return "%s: %s <%s> @ %s (%i)" % (
+            MailerMessage.__name__,
+            self.subject,
+            self.to_email,
+            self.created_at.strftime("%c %Z"),
+            self.id
+        )
+
+    @property
+    def pk(self):
+        return self.id
+
+    @property
+    def from_address(self):
+        return "%s <%s>" % (self.from_name, self.from_email)
+
+    @property
+    def reply_to_address(self):
+        return "%s <%s>" % (self.reply_to_name, self.reply_to_email)
+
+    @property
+    def to_address(self):
+        if self.to_name is None:
+            return self.to_email
+        return "%s <%s>" % (self.to_name, self.to_email)
+
+
+def fetch_records(queryset):
+    """
+    Read the messages of a queryset as delivery records, in two queries.
+
+    Carbon copy recipients are read for the whole batch at once, in the
+    order of MailerMessage.cc_addresses.
+    """
+    records = [
+        DeliveryRecord(*values)
+        for values in queryset.values_list(*DeliveryRecord.fields)
+    ]
+    by_id = {record.id: record for record in records}
+    if by_id:
+        for message_id, name, email in MailerRecipient.objects.filter(
+            message_id__in=by_id
+        ).order_by("-id").values_list("message_id", "name", "email"):
+            by_id[message_id].cc_addresses.append(
+                "%s <%s>" % (name, email) if name else email
+            )
+    return records
+
+
+def update_records(records, fields, queryset=None):
+    """
+    Save fields of delivery records, in one bulk update.
+
+    Only records of messages in queryset, if given, are saved.
+    """
+    if queryset is None:
+        queryset = MailerMessage.objects.all()
+    return queryset.bulk_update(
+        [
+            MailerMessage(
+                id=record.id,
+                **{field: getattr(record, field) for field in fields}
+            )
+            for record in records
+        ],
+        fields=fields,
+    )
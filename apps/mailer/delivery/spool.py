@@ -0,0 +1,205 @@
+import os
+import time
+from pathlib import Path
+from smtplib import (
+    SMTPException, SMTPRecipientsRefused, SMTPResponseException
+)
+
+from django.conf import settings
+from django.core.mail import get_connection
+from django.db import transaction
+
+from .dkim import sign_payloads
+from .engine import deliver
+from .journal import Journal, apply_journals
+from .payload import (
+    MailerEmailMessage, build_message, build_payload, make_message_id
+)
+from .records import fetch_records, update_records
+from ..models.message import MailerMessage
+from ..models.status import MailerMessageStatus
+from ..suppression import suppress_records
+
+
+SPOOL_DIR = getattr(
+    settings, "MAILER_SPOOL_DIR", Path(settings.MEDIA_ROOT, "spool")
+)
+SPOOL_BATCH_SIZE = getattr(settings, "MAILER_SPOOL_BATCH_SIZE", 500)
+SPOOL_LEASE = getattr(settings, "MAILER_SPOOL_LEASE", 3600)
+
+
+class Spool:
+    """
+    Maildir-style outbox of ready-to-send ".eml" files.
+
+    Files are written to "tmp/" and moved to "new/" once their messages are
+    marked as spooled. Senders claim files by moving them to "cur/", and
+    record results in the "journal/" directory instead of the database.
+    Files left behind in "tmp/" or "cur/" by a crash are recovered.
+    """
+
+    def __init__(self, directory=SPOOL_DIR):
+        self.directory = Path(directory)
+        self.tmp = Path(self.directory, "tmp")
+        self.new = Path(self.directory, "new")
+        self.cur = Path(self.directory, "cur")
+        self.journal = Path(self.directory, "journal")
+        for path in (self.tmp, self.new, self.cur, self.journal):
+            path.mkdir(parents=True, exist_ok=True)
+
+    def write(self, message_id, payload):
+        """Write the payload of a message to "tmp/"."""
+        path = Path(self.tmp, "%i.eml" % message_id)
+        with open(path, "wb") as eml:
+            eml.write(payload)
+            eml.flush()
+            os.fsync(eml.fileno())
+        return path
+
+    def publish(self, paths):
+        """Move written files to "new/", ready to be sent."""
+        for path in paths:
+            path.rename(Path(self.new, path.name))
+
+    def claim(self, limit=None):
+        """Claim files to be sent, one by one, by moving them to "cur/"."""
+        claimed = 0
+        with os.scandir(self.new) as entries:
+            for entry in entries:
+                if limit is not None and claimed >= limit:
+                    return
+                path = Path(self.cur, entry.name)
+                try:
+                    os.rename(entry.path, path)
+                except FileNotFoundError:
+                    continue  # Claimed by another sender.
+                os.utime(path)
+                claimed += 1
+                yield path
+
+    def release(self, path):
+        """Return a claimed file to "new/", to be sent again later."""
+        path.rename(Path(self.new, path.name))
+
+    def recover(self, lease=SPOOL_LEASE):
+        """
+        Release files claimed by senders that have since gone away, and
+        publish files left unpublished when their messages were marked as
+        spooled. Files of messages that were not, their transaction having
+        rolled back, are removed, to be written again.
+        """
+        expired = time.time() - lease
+        with os.scandir(self.cur) as entries:
+            for entry in entries:
+                if entry.stat().st_mtime < expired:
+                    self.release(Path(entry.path))
+
+        with os.scandir(self.tmp) as entries:
+            stale = {
+                int(Path(entry.name).stem): Path(entry.path)
+                for entry in entries
+                if entry.stat().st_mtime < expired
+            }
+        spooled = set(
+            MailerMessage.objects.filter(
+                id__in=stale, status=MailerMessageStatus.SPOOLED
+            ).values_list("id", flat=True)
+        )
+        for message_id, path in stale.items():
+            if message_id in spooled:
+                self.publish((path,))
+            else:
+                path.unlink(missing_ok=True)
+
+
+def spool_messages(queryset, batch_size=SPOOL_BATCH_SIZE, progress=None):
+    """
+    Export queued messages to the spool, returning the number spooled.
+
+    Messages are claimed in batches, written out, and marked as spooled
+    without holding any locks while the mail server is contacted. Files are
+    published once their batch commits, or else by Spool.recover(). Messages
+    to suppressed addresses are marked as such instead. After every batch,
+    progress is called with the number of messages done.
+    """
+    spool = Spool()
+    spooled = 0
+    done = 0
+    queued = queryset.filter(status=MailerMessageStatus.QUEUED).order_by("id")
+
+    while True:
+        with transaction.atomic():
+            batch = fetch_records(
+                queued.select_for_update(skip_locked=True)[:batch_size]
+            )
+            if not batch:
+                break
+            suppress_records(batch)
+            records = [
+                record for record in batch
+                if record.status != MailerMessageStatus.SUPPRESSED
+            ]
+            for record in records:
+                record.status = MailerMessageStatus.SPOOLED
+                record.message_id = make_message_id(record)
+            payloads = sign_payloads(
+                [build_payload(build_message(record)) for record in records]
+            )
+            paths = [
+                spool.write(record.pk, payload)
+                for record, payload in zip(records, payloads)
+            ]
+            update_records(batch, fields=("status", "message_id"))
+        spool.publish(paths)
+        spooled += len(paths)
+        done += len(batch)
+        if progress is not None:
+            progress(done)
+
+    return spooled
+
+
+def drain_spool(limit=None):
+    """
+    Send spooled messages, recording the results in the journal.
+
+    Returns the number of messages sent and failed. Temporary mail server
+    errors put the message back in the spool, and stop the run.
+    """
+    spool = Spool()
+    spool.recover()
+    sent = failed = 0
+
+    with Journal(spool.journal) as journal, get_connection() as connection:
+        for path in spool.claim(limit=limit):
+            message_id = int(path.stem)
+            email_msg = MailerEmailMessage.from_payload(
+                path.read_bytes(), connection=connection
+            )
+            try:
+                delivered = deliver(connection, email_msg)
+            except SMTPRecipientsRefused:
+                delivered = False
+            except SMTPResponseException as exc:
+                if exc.smtp_code < 500:
+                    spool.release(path)
+                    raise
+                delivered = False
+            except (SMTPException, OSError):
+                spool.release(path)
+                raise
+
+            if delivered:
+                journal.write(message_id, MailerMessageStatus.SENT)
+                sent += 1
+            else:
+                journal.write(message_id, MailerMessageStatus.FAILED)
+                failed += 1
+            path.unlink()
+
+    return sent, failed
+
+
+def apply_spool_journal():
+    """Apply the spool journal to the messages table."""
+    return apply_journals(Spool().journal)
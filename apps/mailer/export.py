@@ -0,0 +1,150 @@
+import csv
+import json
+import zlib
+from itertools import islice
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from django.utils.cache import patch_vary_headers
+from django.utils.timezone import now
+
+from apps.core.routers import REPLICA_DATABASE
+
+from .models.archive import MailerArchivedMessage
+from .models.recipient import MailerRecipient
+from .models.status import MailerMessageStatus
+
+
+EXPORT_CHUNK_SIZE = getattr(settings, "MAILER_EXPORT_CHUNK_SIZE", 2000)
+EXPORT_DATABASE = getattr(settings, "MAILER_EXPORT_DATABASE", REPLICA_DATABASE)
+EXPORT_FIELDS = (
+    "id", "status", "created_at", "sent_at", "message_id",
+    "from_name", "from_email", "reply_to_name", "reply_to_email",
+    "to_name", "to_email", "subject",
+)
+EXPORT_FORMATS = {
+    "csv": "text/csv",
+    "jsonl": "application/jsonl",
+}
+
+
+class Echo:
+    """File-like object handing back what is written, for csv.writer()."""
+
+    def write(self, value):
+        return value
+
+
+def export_database():
+    """Database to export from, the replica when there is one."""
+    if EXPORT_DATABASE in settings.DATABASES:
+        return EXPORT_DATABASE
+    return "default"
+
+
+def _address(name, email):
+    return "%s <%s>" % (name, email) if name else email
+
+
+def export_rows(queryset, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Read messages, or archived messages, as export rows, a chunk at a time.
+
+    Rows are read in order of ID with a server-side cursor, along with the
+    "CC" recipients of each chunk in a single query, so memory use does not
+    grow with the number of messages.
+    """
+    archived = queryset.model is MailerArchivedMessage
+    fields = EXPORT_FIELDS + (("recipients",) if archived else ())
+    values = queryset.order_by("id").values(*fields).iterator(
+        chunk_size=chunk_size
+    )
+    while chunk := list(islice(values, chunk_size)):
+        if not archived:
+            by_id = {row["id"]: row for row in chunk}
+            for row in chunk:
+                row["recipients"] = []
+            for message_id, name, email in MailerRecipient.objects.using(
+                queryset.db
+            ).filter(message_id__in=by_id).order_by("-id").values_list(
+                "message_id", "name", "email"
+            ):
+                by_id[message_id]["recipients"].append(
+                    {"email": email, "name": name}
+                )
+        for row in chunk:
+            row["status"] = MailerMessageStatus(row["status"]).label
+        yield chunk
+
+
+def _encode_csv(chunks):
+    writer = csv.writer(Echo())
+    yield writer.writerow(EXPORT_FIELDS + ("recipients",))
+    for chunk in chunks:
+        yield "".join(
+            writer.writerow(
+                [row[field] for field in EXPORT_FIELDS] + [
+                    "; ".join(
+                        _address(cc["name"], cc["email"])
+                        for cc in row["recipients"]
+                    )
+                ]
+            )
+            for row in chunk
+        )
+
+
+def _encode_jsonl(chunks):
+    for chunk in chunks:
+        yield "".join(
+            json.dumps(row, default=str) + "\n" for row in chunk
+        )
+
+
+def export_messages(
+    queryset, format="csv", compress=False, chunk_size=EXPORT_CHUNK_SIZE
+):
+    """
+    Export messages as CSV or JSONL, one chunk of bytes at a time.
+
+    Chunks are gzip compressed on the fly when compress is set. Messages
+    are read from the replica database, when there is one.
+    """
+    encode = {"csv": _encode_csv, "jsonl": _encode_jsonl}[format]
+    chunks = encode(
+        export_rows(queryset.using(export_database()), chunk_size)
+    )
+    if not compress:
+        for chunk in chunks:
+            yield chunk.encode()
+        return
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)
+    for chunk in chunks:
+        if data := compressor.compress(chunk.encode()):
+            yield data
+    yield compressor.flush()
+
+
+def export_response(request, queryset, format="csv"):
+    """
+    Stream an export of messages as a file download.
+
+    The download is gzip compressed, with "Content-Encoding", for browsers
+    that accept it, so it is still saved uncompressed.
+    """
+    compress = "gzip" in request.headers.get("Accept-Encoding", "")
+    response = StreamingHttpResponse(
+        export_messages(queryset, format=format, compress=compress),
+        content_type=EXPORT_FORMATS[format],
+    )
+    response.headers["Content-Disposition"] = (
+        'attachment; filename="%s-%s.%s"' % (
+            queryset.model._meta.db_table,
+            now().strftime("%Y%m%d%H%M%S"),
+            format,
+        )
+    )
+    if compress:
+        response.headers["Content-Encoding"] = "gzip"
+    patch_vary_headers(response, ("Accept-Encoding",))
+    return response
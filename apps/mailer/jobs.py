@@ -0,0 +1,120 @@
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections
+
+
+JOB_CACHE = getattr(settings, "MAILER_JOB_CACHE", "default")
+JOB_THREADS = getattr(settings, "MAILER_JOB_THREADS", 2)
+JOB_TIMEOUT = getattr(settings, "MAILER_JOB_TIMEOUT", 86400)
+SESSION_KEY = "mailer_jobs"
+
+# Jobs running in this process, each holding a database connection, at most.
+job_slots = threading.BoundedSemaphore(JOB_THREADS)
+
+
+class Job:
+    """
+    Long running admin task, run in a background thread.
+
+    The state of a job is a small dictionary, stored in JOB_CACHE, which is
+    replaced on every update, so following a job costs one cache read per
+    update, no matter how many messages the job handles. JOB_CACHE must be
+    shared by every process that serves the site.
+    """
+
+    def __init__(self, description, total=None, job_id=None):
+        self.id = job_id or str(uuid.uuid4())
+        self.state = {
+            "id": self.id,
+            "description": description,
+            "status": "running",
+            "done": 0,
+            "total": total,
+            "result": None,
+            "started_at": time.time(),
+            "finished_at": None,
+        }
+
+    @staticmethod
+    def key(job_id):
+        return "mailer:job:%s" % job_id
+
+    @classmethod
+    def get(cls, job_id):
+        """Get the state of a job, or None if it is unknown or expired."""
+        return caches[JOB_CACHE].get(cls.key(job_id))
+
+    @classmethod
+    async def aget(cls, job_id):
+        return await caches[JOB_CACHE].aget(cls.key(job_id))
+
+    def save(self):
+        caches[JOB_CACHE].set(self.key(self.id), self.state, JOB_TIMEOUT)
+
+    def progress(self, done):
+        self.state["done"] = done
+        self.save()
+
+    def finish(self, status, result):
+        self.state.update(
+            status=status, result=result, finished_at=time.time()
+        )
+        self.save()
+
+    def run(self, function, result_message):
+        """
+        Run function(progress=...) and record result_message % its result.
+
+        At most JOB_THREADS jobs run at once in a process, so that they
+        never take more than JOB_THREADS connections from the database pool,
+        others wait for their turn. Threads are not daemons, so that a worker
+        that is shut down gracefully lets its jobs finish.
+        """
+        def target():
+            try:
+                with job_slots:
+                    result = function(progress=self.progress)
+            except Exception as exc:
+                self.finish("failed", str(exc))
+                raise
+            else:
+                self.finish("done", result_message % result)
+            finally:
+                for connection in connections.all(initialized_only=True):
+                    connection.close()
+
+        self.save()
+        threading.Thread(
+            target=target, name="mailer-job-%s" % self.id
+        ).start()
+        return self
+
+
+def start_job(request, description, function, result_message, total=None):
+    """Start a job, and remember it in the session to show its progress."""
+    job = Job(description, total=total).run(function, result_message)
+    request.session[SESSION_KEY] = (
+        request.session.get(SESSION_KEY, []) + [job.id]
+    )
+    return job
+
+
+def session_jobs(request):
+    """
+    Jobs started in this session which are running, or just finished.
+
+    Finished jobs are shown once, then forgotten.
+    """
+    jobs = []
+    for job_id in request.session.get(SESSION_KEY, []):
+        state = Job.get(job_id)
+        if state is not None:
+            jobs.append(state)
+    running = [job["id"] for job in jobs if job["status"] == "running"]
+    if running != request.session.get(SESSION_KEY, []):
+        request.session[SESSION_KEY] = running
+    return jobs
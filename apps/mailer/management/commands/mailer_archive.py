@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+
+from apps.mailer.retention import (
+    ARCHIVE_BATCH_SIZE, ARCHIVE_DAYS, archive_messages, retention_cutoff
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Move sent, canceled, and suppressed messages older than the retention"
+        " period from the messages table to the archive."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=ARCHIVE_DAYS,
+            help="Retention period of messages, in days.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=ARCHIVE_BATCH_SIZE,
+            help="Number of messages archived per transaction.",
+        )
+
+    def handle(self, *args, **options):
+        archived = archive_messages(
+            before=retention_cutoff(options["days"]),
+            batch_size=options["batch_size"],
+        )
+        self.stdout.write(
+            self.style.SUCCESS("%d messages archived." % archived)
+        )
@@ -0,0 +1,55 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+
+from apps.mailer.bounces import (
+    BOUNCE_BATCH_SIZE, BOUNCE_WORKERS,
+    process_bounces, read_maildir, read_mbox
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Mark messages that bounced as failed, and suppress the addresses"
+        " that failed permanently, from the delivery status notifications"
+        " in a maildir or mbox, picking up where the last run left off."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "path",
+            help="Maildir directory, or mbox file, of bounced messages.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=BOUNCE_BATCH_SIZE,
+            help="Number of notifications read per transaction.",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=BOUNCE_WORKERS,
+            help="Number of processes parsing notifications.",
+        )
+
+    def handle(self, *args, **options):
+        path = Path(options["path"])
+        if path.is_dir():
+            messages = read_maildir(path)
+        else:
+            messages = read_mbox(path)
+        read, failed, suppressed = process_bounces(
+            messages,
+            batch_size=options["batch_size"],
+            workers=options["workers"],
+            progress=lambda read, failed, suppressed: self.stdout.write(
+                "%d notifications read..." % read
+            ),
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                "%d notifications read, %d messages failed,"
+                " %d addresses suppressed." % (read, failed, suppressed)
+            )
+        )
@@ -0,0 +1,105 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from apps.mailer.export import (
+    EXPORT_CHUNK_SIZE, EXPORT_FORMATS, export_messages
+)
+from apps.mailer.models.archive import MailerArchivedMessage
+from apps.mailer.models.message import MailerMessage
+from apps.mailer.models.status import MailerMessageStatus
+
+
+class Command(BaseCommand):
+    help = (
+        "Export messages, or archived messages, with their recipients, as"
+        " CSV or JSONL, streamed to a file or standard output."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--format",
+            choices=EXPORT_FORMATS,
+            default="csv",
+            help="Export format.",
+        )
+        parser.add_argument(
+            "--output",
+            default="-",
+            help="File to write the export to, standard output by default.",
+        )
+        parser.add_argument(
+            "--gzip",
+            action="store_true",
+            help="Compress the export with gzip.",
+        )
+        parser.add_argument(
+            "--archive",
+            action="store_true",
+            help="Export archived messages instead.",
+        )
+        parser.add_argument(
+            "--status",
+            action="append",
+            choices=MailerMessageStatus.names,
+            help="Only export messages of this status, may be repeated.",
+        )
+        parser.add_argument(
+            "--since",
+            help="Only export messages created on or after this date.",
+        )
+        parser.add_argument(
+            "--until",
+            help="Only export messages created before this date.",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=EXPORT_CHUNK_SIZE,
+            help="Number of messages read at a time.",
+        )
+
+    def handle(self, *args, **options):
+        model = MailerMessage
+        if options["archive"]:
+            model = MailerArchivedMessage
+        queryset = model.objects.all()
+        if options["status"]:
+            queryset = queryset.filter(
+                status__in=[
+                    MailerMessageStatus[name] for name in options["status"]
+                ]
+            )
+        for option, lookup in (("since", "gte"), ("until", "lt")):
+            if options[option] is None:
+                continue
+            date = parse_date(options[option])
+            if date is None:
+                raise CommandError(
+                    "--%s must be a date, such as 2026-01-31." % option
+                )
+            queryset = queryset.filter(
+                **{"created_at__date__%s" % lookup: date}
+            )
+
+        output = sys.stdout.buffer
+        if options["output"] != "-":
+            output = open(options["output"], "wb")
+        try:
+            for data in export_messages(
+                queryset,
+                format=options["format"],
+                compress=options["gzip"],
+                chunk_size=options["chunk_size"],
+            ):
+                output.write(data)
+        finally:
+            if output is not sys.stdout.buffer:
+                output.close()
+        if options["output"] != "-":
+            self.stdout.write(
+                self.style.SUCCESS(
+                    "Messages exported to %s." % options["output"]
+                )
+            )
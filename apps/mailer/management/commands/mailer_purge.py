@@ -0,0 +1,60 @@
+from django.core.management.base import BaseCommand
+
+from apps.mailer.models.archive import MailerArchivedMessage
+from apps.mailer.models.message import MailerMessage
+from apps.mailer.retention import (
+    PURGE_BATCH_SIZE, PURGE_DAYS, PURGE_PAUSE,
+    purge_archive, purge_messages, retention_cutoff
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete sent, canceled, and suppressed messages, and archived"
+        " messages, older than a number of days, in small batches."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=PURGE_DAYS,
+            help="Delete messages created more than this many days ago.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=PURGE_BATCH_SIZE,
+            help="Number of messages deleted per transaction.",
+        )
+        parser.add_argument(
+            "--pause",
+            type=float,
+            default=PURGE_PAUSE,
+            help="Seconds to pause between batches.",
+        )
+
+    def handle(self, *args, **options):
+        before = retention_cutoff(options["days"])
+        purged = purge_messages(
+            MailerMessage.objects.filter(created_at__lt=before),
+            batch_size=options["batch_size"],
+            pause=options["pause"],
+            progress=lambda purged: self.stdout.write(
+                "%d messages purged..." % purged
+            ),
+        )
+        purged_archive = purge_archive(
+            MailerArchivedMessage.objects.filter(created_at__lt=before),
+            batch_size=options["batch_size"],
+            pause=options["pause"],
+            progress=lambda purged: self.stdout.write(
+                "%d archived messages purged..." % purged
+            ),
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                "%d messages and %d archived messages purged."
+                % (purged, purged_archive)
+            )
+        )
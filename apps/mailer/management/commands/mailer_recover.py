@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from apps.mailer.delivery.engine import recover_messages
+
+
+class Command(BaseCommand):
+    help = (
+        "Reconcile messages left sending by a crashed worker, whose claim"
+        " has expired, without sending them again. Messages missing from"
+        " the journal are marked as failed."
+    )
+
+    def handle(self, *args, **options):
+        recovered = recover_messages()
+        self.stdout.write(
+            self.style.SUCCESS("%d sending messages recovered." % recovered)
+        )
@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand
+
+from apps.mailer.delivery.spool import (
+    apply_spool_journal, drain_spool, spool_messages
+)
+from apps.mailer.models.message import MailerMessage
+
+
+class Command(BaseCommand):
+    help = (
+        "Export queued messages to the spool, send spooled messages,"
+        " or apply the journal of sent messages to the database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "action",
+            choices=("export", "drain", "apply"),
+            help=(
+                '"export" queued messages as ".eml" files, "drain" the spool'
+                ' to the mail server, or "apply" the results to messages.'
+            ),
+        )
+        parser.add_argument(
+            "--limit",
+            type=int,
+            default=None,
+            help="Maximum number of spooled messages to send when draining.",
+        )
+
+    def handle(self, *args, **options):
+        if options["action"] == "export":
+            spooled = spool_messages(MailerMessage.objects.all())
+            self.stdout.write(
+                self.style.SUCCESS("%d queued messages spooled." % spooled)
+            )
+        elif options["action"] == "drain":
+            sent, failed = drain_spool(limit=options["limit"])
+            self.stdout.write(
+                self.style.SUCCESS(
+                    "%d spooled messages sent, %d failed." % (sent, failed)
+                )
+            )
+        else:
+            applied = apply_spool_journal()
+            self.stdout.write(
+                self.style.SUCCESS("%d messages updated." % applied)
+            )
@@ -0,0 +1,49 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from apps.mailer.models.suppression import MailerSuppressionReason
+from apps.mailer.suppression import SUPPRESSION_BATCH_SIZE, import_suppressions
+
+
+class Command(BaseCommand):
+    help = (
+        "Suppress the e-mail addresses listed in files, one per line, or"
+        " read from standard input."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "files",
+            nargs="*",
+            help="Files of e-mail addresses, or - for standard input.",
+        )
+        parser.add_argument(
+            "--reason",
+            choices=[reason.name.lower() for reason in MailerSuppressionReason],
+            default="manual",
+            help="Why the addresses are suppressed.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=SUPPRESSION_BATCH_SIZE,
+            help="Number of addresses imported per query.",
+        )
+
+    def handle(self, *args, **options):
+        reason = MailerSuppressionReason[options["reason"].upper()]
+        added = 0
+        for name in options["files"] or ["-"]:
+            if name == "-":
+                added += import_suppressions(
+                    sys.stdin, reason, options["batch_size"]
+                )
+                continue
+            with open(name, encoding="utf-8") as addresses:
+                added += import_suppressions(
+                    addresses, reason, options["batch_size"]
+                )
+        self.stdout.write(
+            self.style.SUCCESS("%d addresses suppressed." % added)
+        )
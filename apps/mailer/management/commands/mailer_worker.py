@@ -0,0 +1,40 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.mailer.delivery import send_messages
+from apps.mailer.delivery.notify import WORKER_POLL, QueueListener
+from apps.mailer.delivery.spool import spool_messages
+from apps.mailer.models.message import MailerMessage
+
+
+class Command(BaseCommand):
+    help = (
+        "Send queued messages as soon as they are queued, woken by"
+        " PostgreSQL notifications, until interrupted."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--poll",
+            type=float,
+            default=WORKER_POLL,
+            help=(
+                "Seconds to wait for a notification before checking the"
+                " queue anyway."
+            ),
+        )
+
+    def handle(self, *args, **options):
+        action, function = "sent", send_messages
+        if getattr(settings, "MAILER_SPOOL", False):
+            action, function = "spooled", spool_messages
+
+        try:
+            with QueueListener() as listener:
+                while True:
+                    done = function(MailerMessage.objects.all())
+                    if done:
+                        self.stdout.write("%d messages %s." % (done, action))
+                    listener.wait(options["poll"])
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.SUCCESS("Stopped."))
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.6 on 2026-10-19 11:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mailer', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='mailermessage',
+            name='status',
+            field=models.PositiveIntegerField(choices=[(0, 'Sent'), (1, 'Failed'), (2, 'Queued'), (3, 'Canceled'), (4, 'Spooled')], db_column='status', default=2, help_text='Status of the e-mail message.', verbose_name='Status'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.1.6 on 2026-10-19 11:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mailer', '0002_alter_mailermessage_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mailermessage',
+            name='lease_expires_at',
+            field=models.DateTimeField(db_column='lease_expires_at', default=None, editable=False, help_text='Date and time when the claim to send the message expires.', null=True, verbose_name='Lease Expires At'),
+        ),
+        migrations.AddField(
+            model_name='mailermessage',
+            name='message_id',
+            field=models.CharField(blank=True, db_column='message_id', default=None, editable=False, help_text='"Message-ID" header of the e-mail message.', max_length=255, null=True, verbose_name='Message-ID'),
+        ),
+        migrations.AlterField(
+            model_name='mailermessage',
+            name='status',
+            field=models.PositiveIntegerField(choices=[(0, 'Sent'), (1, 'Failed'), (2, 'Queued'), (3, 'Canceled'), (4, 'Spooled'), (5, 'Sending')], db_column='status', default=2, help_text='Status of the e-mail message.', verbose_name='Status'),
+        ),
+        migrations.AddIndex(
+            model_name='mailermessage',
+            index=models.Index(condition=models.Q(('status__in', (2, 5))), fields=['id'], name='messages_pending_idx'),
+        ),
+    ]
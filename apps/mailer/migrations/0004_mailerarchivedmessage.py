@@ -0,0 +1,39 @@
+# Generated by Django 5.1.6 on 2026-10-19 11:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mailer', '0003_mailermessage_message_id_lease'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MailerArchivedMessage',
+            fields=[
+                ('id', models.IntegerField(db_column='id', editable=False, help_text='Message identification number.', primary_key=True, serialize=False, verbose_name='Message ID')),
+                ('status', models.PositiveIntegerField(choices=[(0, 'Sent'), (1, 'Failed'), (2, 'Queued'), (3, 'Canceled'), (4, 'Spooled'), (5, 'Sending')], db_column='status', help_text='Status of the e-mail message.', verbose_name='Status')),
+                ('from_email', models.EmailField(db_column='from_email', help_text='Sender ("From") e-mail address of the message.', max_length=254, verbose_name='From E-mail Address')),
+                ('from_name', models.CharField(blank=True, db_column='from_name', help_text='Sender name in the e-mail "From" address.', max_length=32, null=True, verbose_name='From Name')),
+                ('reply_to_email', models.EmailField(db_column='reply_to_email', help_text='"Reply-To" e-mail address of the message.', max_length=254, verbose_name='Reply-To E-mail Address')),
+                ('reply_to_name', models.CharField(blank=True, db_column='reply_to_name', help_text='Reply-To name of the message.', max_length=32, null=True, verbose_name='Reply-To Name')),
+                ('to_email', models.EmailField(db_column='to_email', help_text='Primary ("To") recipient e-mail address of the message.', max_length=254, verbose_name='Recipient E-mail Address')),
+                ('to_name', models.CharField(blank=True, db_column='to_name', help_text='Recipient name in the e-mail "To" address.', max_length=32, null=True, verbose_name='Recipient Name')),
+                ('recipients', models.JSONField(blank=True, db_column='recipients', default=list, help_text='Additional ("CC") recipients of the message.', verbose_name='Recipients')),
+                ('subject', models.CharField(db_column='subject', help_text='Subject of the e-mail message.', max_length=32, verbose_name='E-mail Subject')),
+                ('body', models.TextField(db_column='body', help_text='Body of the e-mail message.', verbose_name='E-mail Body')),
+                ('message_id', models.CharField(blank=True, db_column='message_id', help_text='"Message-ID" header of the e-mail message.', max_length=255, null=True, verbose_name='Message-ID')),
+                ('created_at', models.DateTimeField(db_column='created_at', help_text='Date and time when the e-mail message was created.', verbose_name='Created At')),
+                ('sent_at', models.DateTimeField(db_column='sent_at', default=None, help_text='Date and time when the e-mail message was sent.', null=True, verbose_name='Sent At')),
+                ('archived_at', models.DateTimeField(auto_now_add=True, db_column='archived_at', help_text='Date and time when the e-mail message was archived.', verbose_name='Archived At')),
+            ],
+            options={
+                'verbose_name': 'Archived Message',
+                'db_table': 'messages_archive',
+                'ordering': ('-id',),
+                'managed': True,
+            },
+        ),
+    ]
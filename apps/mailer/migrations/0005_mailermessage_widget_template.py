@@ -0,0 +1,25 @@
+# Generated by Django 5.1.6 on 2026-10-19 11:35
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mailer', '0004_mailerarchivedmessage'),
+        ('widgets', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mailermessage',
+            name='template',
+            field=models.ForeignKey(blank=True, db_column='template', default=None, editable=False, help_text='Template that the e-mail message was rendered from.', null=True, on_delete=django.db.models.deletion.SET_NULL, to='mailer.mailertemplate', verbose_name='E-mail Template'),
+        ),
+        migrations.AddField(
+            model_name='mailermessage',
+            name='widget',
+            field=models.ForeignKey(blank=True, db_column='widget', default=None, editable=False, help_text='Widget that the e-mail message was queued for.', null=True, on_delete=django.db.models.deletion.SET_NULL, to='widgets.widget', verbose_name='Widget'),
+        ),
+    ]
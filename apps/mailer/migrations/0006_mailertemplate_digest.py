@@ -0,0 +1,23 @@
+# Generated by Django 5.1.6 on 2026-10-19 11:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mailer', '0005_mailermessage_widget_template'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mailertemplate',
+            name='digest',
+            field=models.BooleanField(db_column='digest', default=False, help_text='Combine the notifications of widgets sharing an e-mail address into one message, listing the widgets as WIDGETS?', verbose_name='Digest?'),
+        ),
+        migrations.AddField(
+            model_name='mailertemplate',
+            name='digest_window',
+            field=models.PositiveIntegerField(db_column='digest_window', default=0, help_text='Minutes to hold back notifications to an address after a digest was queued for it.', verbose_name='Digest Window'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.1.6 on 2026-10-19 11:47
+
+from django.db import migrations, models
+
+
+def cancel_duplicates(apps, schema_editor):
+    """Cancel all but the first of duplicate queued messages."""
+    MailerMessage = apps.get_model("mailer", "MailerMessage")
+    queued = MailerMessage.objects.filter(status=2, template__isnull=False)
+    seen = set()
+    duplicates = []
+    for pk, widget, template, to_email in queued.order_by("id").values_list(
+        "id", "widget", "template", "to_email"
+    ):
+        key = (widget, template) if widget else (None, template, to_email)
+        if key in seen:
+            duplicates.append(pk)
+        seen.add(key)
+    MailerMessage.objects.filter(id__in=duplicates).update(status=3)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mailer', '0006_mailertemplate_digest'),
+        ('widgets', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(cancel_duplicates, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='mailermessage',
+            constraint=models.UniqueConstraint(condition=models.Q(('status', 2)), fields=('widget', 'template'), name='messages_queued_widget_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='mailermessage',
+            constraint=models.UniqueConstraint(condition=models.Q(('status', 2), ('widget__isnull', True)), fields=('template', 'to_email'), name='messages_queued_digest_uniq'),
+        ),
+    ]
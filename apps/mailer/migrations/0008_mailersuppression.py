@@ -0,0 +1,39 @@
+# Generated by Django 5.1.6 on 2026-10-19 11:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mailer', '0007_mailermessage_queued_uniq'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MailerSuppression',
+            fields=[
+                ('id', models.BigAutoField(db_column='id', editable=False, help_text='Suppression identification number.', primary_key=True, serialize=False, verbose_name='Suppression ID')),
+                ('address_hash', models.CharField(db_column='address_hash', editable=False, help_text='SHA-256 digest of the normalized e-mail address.', max_length=64, unique=True, verbose_name='Address Hash')),
+                ('reason', models.PositiveSmallIntegerField(choices=[(0, 'Bounced'), (1, 'Unsubscribed'), (2, 'Complained'), (3, 'Manual')], db_column='reason', default=3, help_text='Why the e-mail address is suppressed.', verbose_name='Reason')),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_column='created_at', help_text='Date and time when the address was suppressed.', verbose_name='Created At')),
+            ],
+            options={
+                'verbose_name': 'Suppression',
+                'db_table': 'suppressions',
+                'ordering': ('-id',),
+                'managed': True,
+                'default_related_name': 'suppression',
+            },
+        ),
+        migrations.AlterField(
+            model_name='mailerarchivedmessage',
+            name='status',
+            field=models.PositiveIntegerField(choices=[(0, 'Sent'), (1, 'Failed'), (2, 'Queued'), (3, 'Canceled'), (4, 'Spooled'), (5, 'Sending'), (6, 'Suppressed')], db_column='status', help_text='Status of the e-mail message.', verbose_name='Status'),
+        ),
+        migrations.AlterField(
+            model_name='mailermessage',
+            name='status',
+            field=models.PositiveIntegerField(choices=[(0, 'Sent'), (1, 'Failed'), (2, 'Queued'), (3, 'Canceled'), (4, 'Spooled'), (5, 'Sending'), (6, 'Suppressed')], db_column='status', default=2, help_text='Status of the e-mail message.', verbose_name='Status'),
+        ),
+    ]
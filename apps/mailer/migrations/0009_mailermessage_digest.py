@@ -0,0 +1,68 @@
+# Generated by Django 5.1.6 on 2026-10-19 12:19
+
+from django.db import migrations, models
+
+
+def mark_digests(apps, schema_editor):
+    """Mark digests, the only messages rendered without a widget or name."""
+    MailerMessage = apps.get_model("mailer", "MailerMessage")
+    MailerMessage.objects.filter(
+        widget__isnull=True, to_name__isnull=True, template__digest=True
+    ).update(digest=True)
+
+
+def cancel_duplicates(apps, schema_editor):
+    """Cancel all but the first of duplicate outstanding messages."""
+    MailerMessage = apps.get_model("mailer", "MailerMessage")
+    outstanding = MailerMessage.objects.filter(
+        status__in=(2, 4, 5), template__isnull=False
+    )
+    seen = set()
+    duplicates = []
+    for pk, widget, template, to_email, digest in outstanding.order_by(
+        "id"
+    ).values_list("id", "widget", "template", "to_email", "digest"):
+        if digest:
+            key = (None, template, to_email)
+        elif widget:
+            key = (widget, template)
+        else:
+            continue
+        if key in seen:
+            duplicates.append(pk)
+        seen.add(key)
+    MailerMessage.objects.filter(id__in=duplicates).update(status=3)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mailer', '0008_mailersuppression'),
+        ('widgets', '0002_widget_notified_at'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='mailermessage',
+            name='messages_queued_widget_uniq',
+        ),
+        migrations.RemoveConstraint(
+            model_name='mailermessage',
+            name='messages_queued_digest_uniq',
+        ),
+        migrations.AddField(
+            model_name='mailermessage',
+            name='digest',
+            field=models.BooleanField(db_column='digest', default=False, editable=False, help_text='Is the message a digest, for widgets sharing its e-mail address?', verbose_name='Digest?'),
+        ),
+        migrations.RunPython(mark_digests, migrations.RunPython.noop),
+        migrations.RunPython(cancel_duplicates, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='mailermessage',
+            constraint=models.UniqueConstraint(condition=models.Q(('status__in', (2, 4, 5))), fields=('widget', 'template'), name='messages_queued_widget_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='mailermessage',
+            constraint=models.UniqueConstraint(condition=models.Q(('digest', True), ('status__in', (2, 4, 5))), fields=('template', 'to_email'), name='messages_queued_digest_uniq'),
+        ),
+    ]
@@ -0,0 +1,194 @@
+from django.contrib.admin import display
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+from .status import MailerMessageStatus
+
+
+class MailerArchivedMessage(models.Model):
+    """
+    Mailer archived message.
+    """
+    id = models.IntegerField(
+        db_column="id",
+        editable=False,
+        help_text=_("Message identification number."),
+        primary_key=True,
+        verbose_name=_("Message ID")
+    )
+    status = models.PositiveIntegerField(
+        blank=False,
+        choices=MailerMessageStatus.choices,
+        db_column="status",
+        help_text=_("Status of the e-mail message."),
+        null=False,
+        verbose_name=_("Status")
+    )
+    from_email = models.EmailField(
+        blank=False,
+        db_column="from_email",
+        help_text=_('Sender ("From") e-mail address of the message.'),
+        null=False,
+        verbose_name=_("From E-mail Address")
+    )
+    from_name = models.CharField(
+        blank=True,
+        db_column="from_name",
+        max_length=32,
+        null=True,
+        help_text=_('Sender name in the e-mail "From" address.'),
+        verbose_name=_("From Name")
+    )
+    reply_to_email = models.EmailField(
+        blank=False,
+        db_column="reply_to_email",
+        help_text=_('"Reply-To" e-mail address of the message.'),
+        null=False,
+        verbose_name=_("Reply-To E-mail Address")
+    )
+    reply_to_name = models.CharField(
+        blank=True,
+        db_column="reply_to_name",
+        max_length=32,
+        null=True,
+        help_text=_('Reply-To name of the message.'),
+        verbose_name=_("Reply-To Name")
+    )
+    to_email = models.EmailField(
+        blank=False,
+        db_column="to_email",
+        help_text=_('Primary ("To") recipient e-mail address of the message.'),
+        null=False,
+        verbose_name=_("Recipient E-mail Address")
+    )
+    to_name = models.CharField(
+        blank=True,
+        db_column="to_name",
+        max_length=32,
+        null=True,
+        help_text=_('Recipient name in the e-mail "To" address.'),
+        verbose_name=_("Recipient Name")
+    )
+    recipients = models.JSONField(
+        blank=True,
+        db_column="recipients",
+        default=list,
+        help_text=_('Additional ("CC") recipients of the message.'),
+        verbose_name=_("Recipients")
+    )
+    subject = models.CharField(
+        blank=False,
+        db_column="subject",
+        max_length=32,
+        null=False,
+        help_text=_("Subject of the e-mail message."),
+        verbose_name=_("E-mail Subject")
+    )
+    body = models.TextField(
+        blank=False,
+        db_column="body",
+        null=False,
+        help_text=_("Body of the e-mail message."),
+        verbose_name=_("E-mail Body")
+    )
+    message_id = models.CharField(
+        blank=True,
+        db_column="message_id",
+        max_length=255,
+        null=True,
+        help_text=_('"Message-ID" header of the e-mail message.'),
+        verbose_name=_("Message-ID")
+    )
+    created_at = models.DateTimeField(
+        blank=False,
+        db_column="created_at",
+        null=False,
+        help_text=_("Date and time when the e-mail message was created."),
+        verbose_name=_("Created At")
+    )
+    sent_at = models.DateTimeField(
+        blank=False,
+        db_column="sent_at",
+        default=None,
+        null=True,
+        help_text=_("Date and time when the e-mail message was sent."),
+        verbose_name=_("Sent At")
+    )
+    archived_at = models.DateTimeField(
+        auto_now_add=True,
+        blank=False,
+        db_column="archived_at",
+        editable=False,
+        null=False,
+        help_text=_("Date and time when the e-mail message was archived."),
+        verbose_name=_("Archived At")
+    )
+
+    class Meta:
+        db_table = "messages_archive"
+        managed = True
+        ordering = ("-id",)
+        verbose_name = _("Archived Message")
+
+    def __repr__(self):
+        return "%s: %s (%i)" % (
+            self.__class__.__name__,
+            self.__str__(),
+            self.pk
+        )
+
+    def __str__(self):
+        return "%s <%s> @ %s" % (
+            self.subject,
+            self.to_email,
+            self.created_at.strftime("%c %Z")
+        )
+
+    @classmethod
+    def from_message(cls, message):
+        """Archive a message, along with its (prefetched) recipients."""
+        return cls(
+            id=message.id,
+            status=message.status,
+            from_email=message.from_email,
+            from_name=message.from_name,
+            reply_to_email=message.reply_to_email,
+            reply_to_name=message.reply_to_name,
+            to_email=message.to_email,
+            to_name=message.to_name,
+            recipients=[
+                {"email": cc.email, "name": cc.name}
+                for cc in message.recipient.all()
+            ],
+            subject=message.subject,
+            body=message.body,
+            message_id=message.message_id,
+            created_at=message.created_at,
+            sent_at=message.sent_at,
+        )
+
+    @property
+    @display(description="From", ordering="from_email")
+    def from_address(self):
+        return "%s <%s>" % (self.from_name, self.from_email)
+
+    @property
+    @display(description="Reply-To", ordering="reply_to_email")
+    def reply_to_address(self):
+        return "%s <%s>" % (self.reply_to_name, self.reply_to_email)
+
+    @property
+    @display(description="To", ordering="to_email")
+    def to_address(self):
+        return "%s <%s>" % (self.to_name, self.to_email)
+
+    @property
+    @display(description="CC")
+    def cc_addresses(self) -> list:
+        cc_addresses = []
+        for cc in self.recipients:
+            if cc["name"]:
+                cc_addresses.append("%s <%s>" % (cc["name"], cc["email"]))
+            else:
+                cc_addresses.append(cc["email"])
+        return cc_addresses
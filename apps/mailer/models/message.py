@@ -4,12 +4,19 @@ from django.core.validators import (
 )
 from django.db import models
 from django.conf import settings
-from django.template import Context, Template
 from django.utils.html import format_html
 from django.utils.translation import gettext_lazy as _
 
 from .status import MailerMessageStatus
-from .variable import MailerVariable
+from .template import MailerTemplate
+
+
+# Messages not yet sent, nor given up on.
+OUTSTANDING_STATUSES = (
+    MailerMessageStatus.QUEUED,
+    MailerMessageStatus.SPOOLED,
+    MailerMessageStatus.SENDING,
+)
 
 
 class MailerMessage(models.Model):
@@ -131,10 +138,90 @@ class MailerMessage(models.Model):
         help_text=_("Date and time when the e-mail message was sent."),
         verbose_name=_("Sent At")
     )
+    widget = models.ForeignKey(
+        blank=True,
+        db_column="widget",
+        default=None,
+        editable=False,
+        help_text=_("Widget that the e-mail message was queued for."),
+        null=True,
+        to="widgets.Widget",
+        to_field="id",
+        on_delete=models.SET_NULL,
+        verbose_name=_("Widget")
+    )
+    template = models.ForeignKey(
+        blank=True,
+        db_column="template",
+        default=None,
+        editable=False,
+        help_text=_("Template that the e-mail message was rendered from."),
+        null=True,
+        to=MailerTemplate,
+        to_field="id",
+        on_delete=models.SET_NULL,
+        verbose_name=_("E-mail Template")
+    )
+    digest = models.BooleanField(
+        db_column="digest",
+        default=False,
+        editable=False,
+        help_text=_(
+            "Is the message a digest, for widgets sharing its e-mail address?"
+        ),
+        verbose_name=_("Digest?")
+    )
+    message_id = models.CharField(
+        blank=True,
+        db_column="message_id",
+        default=None,
+        editable=False,
+        max_length=255,
+        null=True,
+        help_text=_('"Message-ID" header of the e-mail message.'),
+        verbose_name=_("Message-ID")
+    )
+    lease_expires_at = models.DateTimeField(
+        blank=False,
+        db_column="lease_expires_at",
+        default=None,
+        editable=False,
+        null=True,
+        help_text=_("Date and time when the claim to send the message expires."),
+        verbose_name=_("Lease Expires At")
+    )
 
     class Meta:
         db_table = "messages"
         default_related_name = "message"
+        indexes = (
+            models.Index(
+                condition=models.Q(
+                    status__in=(
+                        MailerMessageStatus.QUEUED,
+                        MailerMessageStatus.SENDING
+                    )
+                ),
+                fields=("id",),
+                name="messages_pending_idx",
+            ),
+        )
+        constraints = (
+            # A widget, or for digests an address, has one outstanding message
+            # per template, from being queued until it is sent.
+            models.UniqueConstraint(
+                condition=models.Q(status__in=OUTSTANDING_STATUSES),
+                fields=("widget", "template"),
+                name="messages_queued_widget_uniq",
+            ),
+            models.UniqueConstraint(
+                condition=models.Q(
+                    status__in=OUTSTANDING_STATUSES, digest=True
+                ),
+                fields=("template", "to_email"),
+                name="messages_queued_digest_uniq",
+            ),
+        )
         managed = True
         ordering = ("-id",)
         verbose_name = _("Message")
@@ -153,39 +240,11 @@ class MailerMessage(models.Model):
             self.created_at.strftime("%c %Z")
         )
 
-    def prepare(self, widget=None):
-
-        template = widget.template
-        self.from_email = template.from_email
-        self.from_name = template.from_name
-        self.reply_to_email = template.reply_to_email
-        self.reply_to_name = template.reply_to_name
-
-        self.to_email = widget.email
-        self.to_name = widget.name
-
-        context = Context(
-            {
-                "WIDGET": widget,
-
-                "TO_ADDRESS": self.to_address,
-                "TO_EMAIL": self.to_email,
-                "TO_NAME": self.to_name,
-
-                "FROM_ADDRESS": self.from_address,
-                "FROM_EMAIL": self.from_email,
-                "FROM_NAME": self.from_name,
-
-                "REPLY_TO_ADDRESS": self.reply_to_address,
-                "REPLY_TO_EMAIL": self.reply_to_email,
-                "REPLY_TO_NAME": self.reply_to_name,
-            }
-        )
-        for item in MailerVariable.objects.all():
-            context[item.name] = Template(item.value).render(context=context)
-
-        self.subject = Template(template.subject).render(context=context)
-        self.body = Template(template.body).render(context=context)
+    def prepare(self, widget=None, renderer=None, widgets=None):
+        if renderer is None:
+            from ..rendering import MailerRenderer
+            renderer = MailerRenderer(template=(widget or widgets[0]).template)
+        renderer.render(message=self, widget=widget, widgets=widgets)
 
     @property
     def body_html(self):
@@ -204,6 +263,8 @@ class MailerMessage(models.Model):
     @property
     @display(description="To", ordering="to_email")
     def to_address(self):
+        if self.to_name is None:
+            return self.to_email
         return "%s <%s>" % (self.to_name, self.to_email)
 
     @property
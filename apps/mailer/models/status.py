@@ -9,6 +9,9 @@ class MailerMessageStatus(IntegerChoices):
     FAILED = 1
     QUEUED = 2
     CANCELED = 3
+    SPOOLED = 4
+    SENDING = 5
+    SUPPRESSED = 6
 
     def __repr__(self):
         return "%s: %s (%i)" % (
@@ -0,0 +1,74 @@
+from django.db import models
+from django.db.models import IntegerChoices
+from django.utils.translation import gettext_lazy as _
+
+
+class MailerSuppressionReason(IntegerChoices):
+    """
+    Mailer suppression reason choices.
+    """
+    BOUNCED = 0
+    UNSUBSCRIBED = 1
+    COMPLAINED = 2
+    MANUAL = 3
+
+    def __str__(self):
+        return self.name
+
+
+class MailerSuppression(models.Model):
+    """
+    Mailer suppressed address, never sent any e-mail.
+
+    Addresses are stored as the SHA-256 digest of their normalized form only,
+    see apps.mailer.suppression.hash_address().
+    """
+    id = models.BigAutoField(
+        db_column="id",
+        editable=False,
+        help_text=_("Suppression identification number."),
+        primary_key=True,
+        verbose_name=_("Suppression ID")
+    )
+    address_hash = models.CharField(
+        blank=False,
+        db_column="address_hash",
+        editable=False,
+        help_text=_("SHA-256 digest of the normalized e-mail address."),
+        max_length=64,
+        null=False,
+        unique=True,
+        verbose_name=_("Address Hash")
+    )
+    reason = models.PositiveSmallIntegerField(
+        blank=False,
+        choices=MailerSuppressionReason.choices,
+        db_column="reason",
+        default=MailerSuppressionReason.MANUAL,
+        help_text=_("Why the e-mail address is suppressed."),
+        null=False,
+        verbose_name=_("Reason")
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        db_column="created_at",
+        help_text=_("Date and time when the address was suppressed."),
+        verbose_name=_("Created At")
+    )
+
+    class Meta:
+        db_table = "suppressions"
+        default_related_name = "suppression"
+        managed = True
+        ordering = ("-id",)
+        verbose_name = _("Suppression")
+
+    def __repr__(self):
+        return "%s: %s (%i)" % (
+            self.__class__.__name__,
+            self.__str__(),
+            self.pk
+        )
+
+    def __str__(self):
+        return self.address_hash
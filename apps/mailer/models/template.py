@@ -109,6 +109,24 @@ class MailerTemplate(models.Model):
         null=False,
         verbose_name=_("E-mail Body")
     )
+    digest = models.BooleanField(
+        db_column="digest",
+        default=False,
+        help_text=_(
+            "Combine the notifications of widgets sharing an e-mail address"
+            " into one message, listing the widgets as WIDGETS?"
+        ),
+        verbose_name=_("Digest?")
+    )
+    digest_window = models.PositiveIntegerField(
+        db_column="digest_window",
+        default=0,
+        help_text=_(
+            "Minutes to hold back notifications to an address after a digest"
+            " was queued for it."
+        ),
+        verbose_name=_("Digest Window")
+    )
 
     class Meta:
         db_table = "templates"
@@ -0,0 +1,208 @@
+from django.conf import settings
+from django.db import transaction
+from django.template import Context, Template
+from django.template.base import Node, NodeList, TextNode, VariableNode
+from django.template.defaulttags import (
+    AutoEscapeControlNode, CommentNode, FilterNode, FirstOfNode, ForNode,
+    IfNode, LoadNode, SpacelessNode, TemplateTagNode, VerbatimNode,
+    WidthRatioNode, WithNode,
+)
+
+from .analysis import (
+    bound_names, node_references, required_variables, source_references
+)
+from .models.message import MailerMessage
+from .models.status import MailerMessageStatus
+from .models.variable import MailerVariable
+
+
+RENDER_BATCH_SIZE = getattr(settings, "MAILER_RENDER_BATCH_SIZE", 1000)
+
+
+# Context names that differ between messages of the same template.
+MESSAGE_NAMES = frozenset(
+    ("WIDGET", "WIDGETS", "TO_ADDRESS", "TO_EMAIL", "TO_NAME")
+)
+
+# Tags which render the same output for the same context, every time.
+PURE_NODES = (
+    AutoEscapeControlNode, CommentNode, FilterNode, FirstOfNode, ForNode,
+    IfNode, LoadNode, SpacelessNode, TemplateTagNode, TextNode,
+    VariableNode, VerbatimNode, WidthRatioNode, WithNode,
+)
+
+
+def _foldable(node, dynamic):
+    """Can a template node be rendered once, ahead of every message?"""
+    for child in node.get_nodes_by_type(Node):
+        if not isinstance(child, PURE_NODES) or getattr(child, "asvar", None):
+            return False
+    references = node_references(node)
+    return references is not None and not references & dynamic
+
+
+def partial_template(source, context, dynamic):
+    """
+    Compile a template, with the parts that do not use dynamic names
+    rendered ahead of time, in the given context, into plain text.
+    """
+    template = Template(source)
+    dynamic = dynamic | bound_names(template)
+    nodelist = NodeList()
+    with context.render_context.push_state(template):
+        with context.bind_template(template):
+            for node in template.nodelist:
+                if _foldable(node, dynamic):
+                    text = node.render_annotated(context)
+                    if nodelist and isinstance(nodelist[-1], TextNode):
+                        nodelist[-1] = TextNode(nodelist[-1].s + text)
+                    else:
+                        nodelist.append(TextNode(text))
+                else:
+                    nodelist.append(node)
+    template.nodelist = nodelist
+    return template
+
+
+class MailerRenderer:
+    """
+    Render messages from one template.
+
+    The subject and body of the template, and the values of variables, are
+    compiled once, and the variables are read from the database once, no
+    matter how many messages are rendered. Only the variables that the
+    template uses, directly or through other variables, are rendered.
+
+    Variables, and parts of the subject and body, that do not depend on the
+    widget or its recipient, are rendered once, ahead of every message.
+    """
+
+    def __init__(self, template, variables=None):
+        if variables is None:
+            variables = MailerVariable.objects.all()
+        variables = tuple(
+            (variable.name, variable.value) for variable in variables
+        )
+        required = required_variables(
+            (template.subject, template.body), variables
+        )
+        self.template = template
+
+        context = Context(self.template_context())
+        dynamic = set(MESSAGE_NAMES)
+        self.variables = []
+        for name, value in variables:
+            if required is not None and name not in required:
+                continue
+            references = source_references(value)
+            if references is None or references & dynamic:
+                dynamic.add(name)
+                self.variables.append((name, Template(value)))
+            else:
+                context[name] = Template(value).render(context=context)
+                self.variables.append((name, context[name]))
+
+        self.subject = partial_template(template.subject, context, dynamic)
+        self.body = partial_template(template.body, context, dynamic)
+
+    def template_context(self):
+        """Context of the template addresses, the same for every message."""
+        return {
+            "FROM_ADDRESS": self.template.from_address,
+            "FROM_EMAIL": self.template.from_email,
+            "FROM_NAME": self.template.from_name,
+
+            "REPLY_TO_ADDRESS": self.template.reply_to_address,
+            "REPLY_TO_EMAIL": self.template.reply_to_email,
+            "REPLY_TO_NAME": self.template.reply_to_name,
+        }
+
+    def render(self, message, widget=None, widgets=None):
+        """
+        Render the addresses, subject, and body of a widget message.
+
+        Digests are rendered from widgets sharing an e-mail address, listed
+        as WIDGETS, without a WIDGET. A single widget is listed on its own.
+        """
+        message.template = self.template
+        message.widget = widget
+        message.digest = widget is None
+
+        message.from_email = self.template.from_email
+        message.from_name = self.template.from_name
+        message.reply_to_email = self.template.reply_to_email
+        message.reply_to_name = self.template.reply_to_name
+
+        if widgets is None:
+            widgets = [widget]
+            message.to_name = widget.name
+        else:
+            message.to_name = None
+        message.to_email = widgets[0].email
+
+        context = Context(
+            {
+                "WIDGET": widget,
+                "WIDGETS": widgets,
+
+                "TO_ADDRESS": message.to_address,
+                "TO_EMAIL": message.to_email,
+                "TO_NAME": message.to_name,
+
+                **self.template_context(),
+            }
+        )
+        for name, value in self.variables:
+            if isinstance(value, str):
+                context[name] = value
+            else:
+                context[name] = value.render(context=context)
+
+        message.subject = self.subject.render(context=context)
+        message.body = self.body.render(context=context)
+
+
+def rerender_messages(template, batch_size=RENDER_BATCH_SIZE):
+    """
+    Render queued messages of a template again, after it has been changed.
+
+    Messages are rendered in batches, with a single renderer, and written
+    back with one bulk update per batch. Returns the number re-rendered.
+    Digests, which do not keep track of their widgets, are left as they are,
+    as are messages of widgets which have since lost their e-mail address,
+    or been moved to another template.
+    """
+    renderer = MailerRenderer(template)
+    rendered = 0
+    last_id = 0
+    queued = MailerMessage.objects.filter(
+        status=MailerMessageStatus.QUEUED,
+        template=template,
+        widget__template=template,
+        widget__email__isnull=False,
+    ).exclude(widget__email="").select_related("widget").order_by("id")
+
+    while True:
+        with transaction.atomic():
+            batch = list(
+                queued.filter(id__gt=last_id).select_for_update(
+                    skip_locked=True, of=("self",)
+                )[:batch_size]
+            )
+            if not batch:
+                break
+            for obj in batch:
+                renderer.render(obj, obj.widget)
+            MailerMessage.objects.bulk_update(
+                batch,
+                fields=(
+                    "from_email", "from_name",
+                    "reply_to_email", "reply_to_name",
+                    "to_email", "to_name",
+                    "subject", "body",
+                ),
+            )
+        last_id = batch[-1].id
+        rendered += len(batch)
+
+    return rendered
@@ -0,0 +1,159 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils.timezone import now
+
+from .models.archive import MailerArchivedMessage
+from .models.message import MailerMessage
+from .models.recipient import MailerRecipient
+from .models.status import MailerMessageStatus
+
+
+ARCHIVE_DAYS = getattr(settings, "MAILER_ARCHIVE_DAYS", 90)
+ARCHIVE_BATCH_SIZE = getattr(settings, "MAILER_ARCHIVE_BATCH_SIZE", 1000)
+PURGE_DAYS = getattr(settings, "MAILER_PURGE_DAYS", 365)
+PURGE_BATCH_SIZE = getattr(settings, "MAILER_PURGE_BATCH_SIZE", 5000)
+PURGE_PAUSE = getattr(settings, "MAILER_PURGE_PAUSE", 0.5)
+# Statuses of finished messages, which are archived, then purged.
+RETAINED_STATUSES = (
+    MailerMessageStatus.SENT,
+    MailerMessageStatus.CANCELED,
+    MailerMessageStatus.SUPPRESSED,
+)
+
+
+def retention_cutoff(days):
+    """Date and time before which finished messages are no longer kept."""
+    return now() - timedelta(days=days)
+
+
+def archive_messages(before, batch_size=ARCHIVE_BATCH_SIZE):
+    """
+    Move finished messages created before a date to the archive.
+
+    Messages are moved in batches, each in its own short transaction, and
+    the number of messages archived is returned.
+    """
+    archived = 0
+    last_id = 0
+    finished = MailerMessage.objects.filter(
+        status__in=RETAINED_STATUSES, created_at__lt=before
+    ).order_by("id")
+
+    while True:
+        with transaction.atomic():
+            batch = list(
+                finished.filter(id__gt=last_id).select_for_update(
+                    skip_locked=True
+                ).prefetch_related("recipient")[:batch_size]
+            )
+            if not batch:
+                break
+            MailerArchivedMessage.objects.bulk_create(
+                [MailerArchivedMessage.from_message(obj) for obj in batch],
+                ignore_conflicts=True,
+            )
+            MailerMessage.objects.filter(
+                id__in=[obj.id for obj in batch]
+            ).delete()
+        last_id = batch[-1].id
+        archived += len(batch)
+
+    return archived
+
+
+def purge_messages(
+    queryset, batch_size=PURGE_BATCH_SIZE, pause=PURGE_PAUSE, progress=None
+):
+    """
+    Delete finished messages, and their recipients, in batches.
+
+    Each batch of message IDs is found by keyset pagination and deleted with
+    raw DELETE statements in its own short transaction, bypassing the
+    collector, pausing between batches to let replicas catch up. The
+    progress callable, if any, is given the running total after each batch.
+    """
+    purged = 0
+    last_id = 0
+    finished = queryset.filter(status__in=RETAINED_STATUSES).order_by("id")
+    messages_table = MailerMessage._meta.db_table
+    recipients_table = MailerRecipient._meta.db_table
+    recipients_column = MailerRecipient._meta.get_field("message").column
+    statuses = ", ".join(str(int(status)) for status in RETAINED_STATUSES)
+
+    while True:
+        ids = list(
+            finished.filter(id__gt=last_id).values_list(
+                "id", flat=True
+            )[:batch_size]
+        )
+        if not ids:
+            break
+        last_id = ids[-1]
+        placeholders = ", ".join(["%s"] * len(ids))
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                "DELETE FROM %s WHERE %s IN ("
+                "SELECT id FROM %s WHERE id IN (%s) AND status IN (%s)"
+                ")" % (
+                    recipients_table, recipients_column,
+                    messages_table, placeholders, statuses
+                ),
+                ids,
+            )
+            cursor.execute(
+                "DELETE FROM %s WHERE id IN (%s) AND status IN (%s)" % (
+                    messages_table, placeholders, statuses
+                ),
+                ids,
+            )
+            purged += cursor.rowcount
+        if progress:
+            progress(purged)
+        if pause:
+            time.sleep(pause)
+
+    return purged
+
+
+def purge_archive(
+    queryset, batch_size=PURGE_BATCH_SIZE, pause=PURGE_PAUSE, progress=None
+):
+    """
+    Delete archived messages, in batches.
+
+    Archived messages keep their recipients along with them, so each batch
+    is a single raw DELETE statement, in its own short transaction, found
+    and paced the same way as by purge_messages().
+    """
+    purged = 0
+    last_id = 0
+    archived = queryset.order_by("id")
+    archive_table = MailerArchivedMessage._meta.db_table
+
+    while True:
+        ids = list(
+            archived.filter(id__gt=last_id).values_list(
+                "id", flat=True
+            )[:batch_size]
+        )
+        if not ids:
+            break
+        last_id = ids[-1]
+        placeholders = ", ".join(["%s"] * len(ids))
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                "DELETE FROM %s WHERE id IN (%s)" % (
+                    archive_table, placeholders
+                ),
+                ids,
+            )
+            purged += cursor.rowcount
+        if progress:
+            progress(purged)
+        if pause:
+            time.sleep(pause)
+
+    return purged
@@ -0,0 +1,15 @@
+from django.db.models.signals import post_save
+
+from .delivery.notify import notify_queued
+from .models.message import MailerMessage
+from .models.status import MailerMessageStatus
+
+
+def message_saved(sender, instance, using, **kwargs):
+    if instance.status == MailerMessageStatus.QUEUED:
+        notify_queued(using=using)
+
+
+def connect_signals():
+    """Wake delivery workers whenever a message is queued."""
+    post_save.connect(message_saved, sender=MailerMessage)
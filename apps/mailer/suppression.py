@@ -0,0 +1,187 @@
+import threading
+import time
+from email.utils import parseaddr
+from hashlib import sha256
+from itertools import islice
+from math import ceil, log
+
+from django.conf import settings
+
+from .models.status import MailerMessageStatus
+from .models.suppression import MailerSuppression, MailerSuppressionReason
+
+
+SUPPRESSION_BATCH_SIZE = getattr(
+    settings, "MAILER_SUPPRESSION_BATCH_SIZE", 10000
+)
+SUPPRESSION_ERROR_RATE = getattr(
+    settings, "MAILER_SUPPRESSION_ERROR_RATE", 0.01
+)
+SUPPRESSION_REBUILD = getattr(settings, "MAILER_SUPPRESSION_REBUILD", 3600)
+
+
+def normalize_address(address):
+    """Normalize an e-mail address, for comparison."""
+    return address.strip().lower()
+
+
+def hash_address(address):
+    """SHA-256 hex digest of a normalized e-mail address."""
+    return sha256(normalize_address(address).encode()).hexdigest()
+
+
+class BloomFilter:
+    """
+    Set of SHA-256 hex digests, in a fixed number of bits.
+
+    Membership tests may return false positives, at about error_rate while
+    no more than capacity digests were added, but never false negatives.
+    Since digests are uniformly distributed already, bit positions are
+    taken from the digest itself, by double hashing.
+    """
+
+    def __init__(self, capacity, error_rate=SUPPRESSION_ERROR_RATE):
+        self.capacity = max(capacity, 1024)
+        self.size = ceil(-self.capacity * log(error_rate) / log(2) ** 2)
+        self.hashes = max(1, round(self.size / self.capacity * log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, digest):
+        value = int(digest, 16)
+        first, second = value & (2 ** 64 - 1), (value >> 64) | 1
+        for index in range(self.hashes):
+            yield (first + index * second) % self.size
+
+    def add(self, digest):
+        for position in self._positions(digest):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, digest):
+        return all(
+            self.bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(digest)
+        )
+
+
+class SuppressionList:
+    """
+    In-process cache of suppressed addresses, as a Bloom filter.
+
+    Addresses the filter rejects are not suppressed, without a query. The
+    few it may contain are looked up by their unique hashes, in one query
+    for any number of addresses. Before every lookup, suppressions added
+    since are read by primary key, and the filter is rebuilt from scratch
+    every SUPPRESSION_REBUILD seconds, or once it holds twice its capacity.
+    """
+
+    def __init__(self):
+        self.bloom = None
+        self.built_at = 0
+        self.last_id = 0
+        self.lock = threading.Lock()
+
+    def refresh(self):
+        with self.lock:
+            if (
+                self.bloom is None
+                or self.bloom.count > self.bloom.capacity * 2
+                or time.monotonic() - self.built_at > SUPPRESSION_REBUILD
+            ):
+                self.bloom = BloomFilter(
+                    capacity=MailerSuppression.objects.count() * 2
+                )
+                self.built_at = time.monotonic()
+                self.last_id = 0
+            for pk, digest in MailerSuppression.objects.filter(
+                id__gt=self.last_id
+            ).order_by("id").values_list("id", "address_hash").iterator(
+                chunk_size=SUPPRESSION_BATCH_SIZE
+            ):
+                self.bloom.add(digest)
+                self.last_id = pk
+
+    def suppressed(self, addresses):
+        """Which of the e-mail addresses are suppressed."""
+        self.refresh()
+        digests = {}
+        for address in addresses:
+            if address:
+                digests.setdefault(hash_address(address), set()).add(address)
+        maybe = [digest for digest in digests if digest in self.bloom]
+        if not maybe:
+            return set()
+        return {
+            address
+            for digest in MailerSuppression.objects.filter(
+                address_hash__in=maybe
+            ).values_list("address_hash", flat=True)
+            for address in digests[digest]
+        }
+
+
+suppression_list = SuppressionList()
+
+
+def suppressed_addresses(addresses):
+    """Which of the e-mail addresses are suppressed."""
+    return suppression_list.suppressed(addresses)
+
+
+def suppress_records(records):
+    """
+    Keep delivery records from sending to suppressed addresses.
+
+    Messages to a suppressed address are marked as suppressed, and
+    suppressed carbon copy recipients are dropped from the others.
+    """
+    ccs = {
+        cc: parseaddr(cc)[1]
+        for record in records
+        for cc in record.cc_addresses
+    }
+    suppressed = suppressed_addresses(
+        {record.to_email for record in records} | set(ccs.values())
+    )
+    if not suppressed:
+        return 0
+    for record in records:
+        if record.to_email in suppressed:
+            record.status = MailerMessageStatus.SUPPRESSED
+        record.cc_addresses = [
+            cc for cc in record.cc_addresses if ccs[cc] not in suppressed
+        ]
+    return len(suppressed)
+
+
+def import_suppressions(
+    addresses,
+    reason=MailerSuppressionReason.MANUAL,
+    batch_size=SUPPRESSION_BATCH_SIZE
+):
+    """
+    Suppress e-mail addresses, in bulk, returning the number newly added.
+
+    Addresses may be any iterable, such as the lines of a file, and are
+    read in batches. Addresses suppressed already are left as they are.
+    """
+    added = 0
+    digests = (
+        hash_address(address) for address in addresses if address.strip()
+    )
+    while batch := set(islice(digests, batch_size)):
+        batch -= set(
+            MailerSuppression.objects.filter(
+                address_hash__in=batch
+            ).values_list("address_hash", flat=True)
+        )
+        MailerSuppression.objects.bulk_create(
+            [
+                MailerSuppression(address_hash=digest, reason=reason)
+                for digest in batch
+            ],
+            ignore_conflicts=True,
+        )
+        added += len(batch)
+    return added
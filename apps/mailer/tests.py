@@ -0,0 +1,577 @@
+import os
+import tempfile
+from base64 import b64encode
+from datetime import timedelta
+from hashlib import sha256
+from pathlib import Path
+from unittest import mock, skipUnless
+
+from django.core.cache import caches
+from django.template import Context, Template
+from django.test import TestCase, override_settings
+from django.utils.timezone import now
+
+try:
+    import dkim
+    from cryptography.hazmat.primitives.asymmetric import rsa
+    from cryptography.hazmat.primitives.serialization import (
+        Encoding, NoEncryption, PrivateFormat, PublicFormat,
+    )
+except ImportError:
+    dkim = None
+
+from apps.widgets.models.widget import Widget
+from apps.widgets.notifications import queue_notifications
+
+from .analysis import required_variables
+from .bounces import read_maildir, read_mbox
+from .delivery.dkim import (
+    body_hash, canonical_header, private_key, sign_payload, split_headers,
+)
+from .delivery.engine import (
+    claim_messages, commit_messages, recover_messages, send_messages,
+)
+from .delivery.journal import Journal
+from .delivery.payload import PAYLOAD_CACHE, build_message, payload_key
+from .delivery.spool import Spool
+from .models.archive import MailerArchivedMessage
+from .models.message import MailerMessage
+from .models.status import MailerMessageStatus
+from .models.template import MailerTemplate
+from .models.variable import MailerVariable
+from .rendering import MailerRenderer
+from .retention import archive_messages, purge_archive, purge_messages
+from .suppression import (
+    BloomFilter, SuppressionList, hash_address, import_suppressions,
+)
+
+
+def recover(batch, status=None):
+    """
+    Recover a claimed batch, journaled with status, or not at all, returning
+    the statuses of its messages.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        if status is not None:
+            with Journal(directory) as journal:
+                for record in batch:
+                    journal.write(record.pk, status)
+        with mock.patch("apps.mailer.delivery.engine.JOURNAL_DIR", directory):
+            recover_messages()
+    return list(
+        MailerMessage.objects.filter(
+            id__in=[record.pk for record in batch]
+        ).values_list("status", flat=True)
+    )
+
+
+class OutstandingMessageTests(TestCase):
+    """
+    A widget, or a digest address, has at most one outstanding message per
+    template, which sending and recovering it never conflict with.
+    """
+
+    def setUp(self):
+        self.template = MailerTemplate.objects.create(
+            name="status",
+            from_email="widgets@example.com",
+            reply_to_email="widgets@example.com",
+            subject="Widget status",
+            body="{{ WIDGETS|length }} widgets",
+        )
+        self.widget = Widget.objects.create(
+            name="first", email="first@example.com", template=self.template
+        )
+
+    def claim(self):
+        return claim_messages(MailerMessage.objects.all())
+
+    def test_sending_message_is_not_queued_again(self):
+        self.assertEqual(queue_notifications(Widget.objects.all()), 1)
+        self.claim()
+        self.assertEqual(queue_notifications(Widget.objects.all()), 0)
+        self.assertEqual(MailerMessage.objects.count(), 1)
+
+    def test_messages_queued_concurrently_are_not_counted(self):
+        queue_notifications(Widget.objects.all())
+        with mock.patch(
+            "apps.widgets.notifications.queued_sources", return_value=set()
+        ):
+            self.assertEqual(queue_notifications(Widget.objects.all()), 0)
+        self.assertEqual(MailerMessage.objects.count(), 1)
+
+    def test_commit_queues_unsent_messages_again(self):
+        queue_notifications(Widget.objects.all())
+        batch = self.claim()
+        queue_notifications(Widget.objects.all())
+        commit_messages(batch)
+        self.assertEqual(
+            list(MailerMessage.objects.values_list("status", flat=True)),
+            [MailerMessageStatus.QUEUED],
+        )
+
+    def test_recover_queues_expired_messages_again(self):
+        queue_notifications(Widget.objects.all())
+        batch = self.claim()
+        MailerMessage.objects.update(lease_expires_at=now() - timedelta(1))
+        queue_notifications(Widget.objects.all())
+        self.assertEqual(
+            recover(batch, MailerMessageStatus.QUEUED),
+            [MailerMessageStatus.QUEUED],
+        )
+
+    def test_delete_widgets_sharing_an_address(self):
+        Widget.objects.create(
+            name="second", email="first@example.com", template=self.template
+        )
+        self.assertEqual(queue_notifications(Widget.objects.all()), 2)
+        Widget.objects.all().delete()
+        self.assertEqual(
+            MailerMessage.objects.filter(
+                status=MailerMessageStatus.QUEUED, widget__isnull=True
+            ).count(),
+            2,
+        )
+
+    def test_digest_is_queued_once_per_address(self):
+        self.template.digest = True
+        self.template.save()
+        Widget.objects.create(
+            name="second", email="first@example.com", template=self.template
+        )
+        self.assertEqual(queue_notifications(Widget.objects.all()), 1)
+        self.claim()
+        self.assertEqual(queue_notifications(Widget.objects.all()), 0)
+        message = MailerMessage.objects.get()
+        self.assertTrue(message.digest)
+        self.assertEqual(message.body, "2 widgets")
+
+
+class RecoveryTests(TestCase):
+    """Messages left sending are only queued again if surely never sent."""
+
+    def setUp(self):
+        MailerMessage.objects.create(
+            to_email="first@example.com", subject="Status", body="Body"
+        )
+        self.batch = claim_messages(MailerMessage.objects.all())
+        expired = now() - timedelta(1)
+        MailerMessage.objects.update(lease_expires_at=expired)
+        for record in self.batch:
+            record.lease_expires_at = expired
+
+    def test_claimed_message_is_queued_again(self):
+        self.assertEqual(
+            recover(self.batch, MailerMessageStatus.QUEUED),
+            [MailerMessageStatus.QUEUED],
+        )
+
+    def test_handed_off_message_fails(self):
+        self.assertEqual(
+            recover(self.batch, MailerMessageStatus.SENDING),
+            [MailerMessageStatus.FAILED],
+        )
+
+    def test_sent_message_is_sent(self):
+        self.assertEqual(
+            recover(self.batch, MailerMessageStatus.SENT),
+            [MailerMessageStatus.SENT],
+        )
+
+    def test_message_missing_from_journal_fails(self):
+        self.assertEqual(recover(self.batch), [MailerMessageStatus.FAILED])
+
+    def test_commit_leaves_recovered_messages_alone(self):
+        recover(self.batch, MailerMessageStatus.QUEUED)
+        reclaimed = claim_messages(MailerMessage.objects.all())
+        self.batch[0].status = MailerMessageStatus.SENT
+        self.batch[0].sent_at = now()
+        commit_messages(self.batch)
+        message = MailerMessage.objects.get()
+        self.assertEqual(message.status, MailerMessageStatus.SENDING)
+        self.assertEqual(
+            message.lease_expires_at, reclaimed[0].lease_expires_at
+        )
+
+
+class SpoolRecoveryTests(TestCase):
+    """Files left in "tmp/" by a crash are sent only if their messages were."""
+
+    def test_stale_files_are_published_if_spooled(self):
+        spooled, queued = [
+            MailerMessage.objects.create(
+                to_email="first@example.com", subject="Status", body="Body",
+                status=status,
+            )
+            for status in (
+                MailerMessageStatus.SPOOLED, MailerMessageStatus.QUEUED
+            )
+        ]
+        with tempfile.TemporaryDirectory() as directory:
+            spool = Spool(directory)
+            for message in (spooled, queued):
+                path = spool.write(message.pk, b"Subject: Status\r\n\r\n")
+                os.utime(path, (0, 0))
+            spool.recover()
+            self.assertEqual(
+                sorted(path.name for path in spool.new.iterdir()),
+                ["%i.eml" % spooled.pk],
+            )
+            self.assertEqual(list(spool.tmp.iterdir()), [])
+
+
+@override_settings(CACHES={
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    "shared": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+})
+class PayloadCacheTests(TestCase):
+    """Only the payloads of messages that were not sent are cached."""
+
+    def setUp(self):
+        self.message = MailerMessage.objects.create(
+            to_email="first@example.com", subject="Status", body="Body"
+        )
+        caches[PAYLOAD_CACHE].clear()
+
+    def send(self, delivered):
+        with tempfile.TemporaryDirectory() as directory, mock.patch(
+            "apps.mailer.delivery.engine.JOURNAL_DIR", directory
+        ), mock.patch(
+            "apps.mailer.delivery.engine.deliver", return_value=delivered
+        ) as deliver:
+            send_messages(MailerMessage.objects.all())
+        return deliver.call_args.args[1].payload
+
+    def cached(self):
+        key = payload_key(build_message(self.message), self.message)
+        return caches[PAYLOAD_CACHE].get(key)
+
+    def test_sent_payload_is_not_cached(self):
+        self.send(True)
+        self.assertIsNone(self.cached())
+
+    def test_unsent_payload_is_reused(self):
+        first = self.send(False)
+        self.assertIsNotNone(self.cached())
+        self.assertEqual(self.send(True), first)
+
+
+class BounceReaderTests(TestCase):
+    """Marking a message done checkpoints it, and those read before it."""
+
+    def test_mbox_checkpoint(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory, "bounces")
+            path.write_bytes(
+                b"From a\nSubject: 1\n\nFrom b\nSubject: 2\n\n"
+            )
+            messages = list(read_mbox(path))
+            self.assertEqual(len(messages), 2)
+            done, _ = messages[-1]
+            done()
+            self.assertEqual(list(read_mbox(path)), [])
+            self.assertEqual(
+                sorted(entry.name for entry in Path(directory).iterdir()),
+                ["bounces", "bounces.offset"],
+            )
+
+    def test_maildir_checkpoint(self):
+        with tempfile.TemporaryDirectory() as directory:
+            Path(directory, "new").mkdir()
+            for name in ("1", "2"):
+                Path(directory, "new", name).write_bytes(b"Subject: 1\n\n")
+            messages = list(read_maildir(directory))
+            done, _ = messages[-1]
+            done()
+            self.assertEqual(list(read_maildir(directory)), [])
+            self.assertEqual(len(list(Path(directory, "cur").iterdir())), 2)
+
+
+class RendererTests(TestCase):
+    """Messages render as if their whole template was rendered for each."""
+
+    variables = (
+        ("SITE", "Widgets & Co"),
+        ("SIGNATURE", "The {{ SITE }} team"),
+        ("GREETING", "Hello {{ TO_NAME|default:TO_EMAIL }}, {{ SIGNATURE }}"),
+        ("UNUSED", "{{ WIDGET.description }}"),
+    )
+
+    def setUp(self):
+        self.template = MailerTemplate.objects.create(
+            name="status",
+            from_email="widgets@example.com",
+            from_name="Widgets",
+            reply_to_email="widgets@example.com",
+            subject="{{ SITE }}: {% firstof WIDGET.name 'digest' %}",
+            body=(
+                "{% autoescape off %}{{ GREETING }}{% endautoescape %}\n"
+                "{{ GREETING }}\n"
+                "{% for widget in WIDGETS %}"
+                "{% cycle 'odd' 'even' %} {{ forloop.counter }}. "
+                "{% if widget.active %}{{ widget.name }}"
+                "{% else %}{{ widget.name }} (inactive){% endif %}\n"
+                "{% endfor %}"
+                "{% with site=SITE|upper %}{{ site }}{% endwith %}\n"
+                "{% firstof TO_NAME TO_EMAIL as recipient %}{{ recipient }}\n"
+                "{% if FROM_NAME %}{{ FROM_ADDRESS }}{% endif %}\n"
+                "{{ SIGNATURE|upper }}"
+            ),
+        )
+        self.widgets = [
+            Widget.objects.create(
+                name=name, email="first@example.com", active=active,
+                template=self.template,
+            )
+            for name, active in (("first", True), ("second", False))
+        ]
+
+    def expected(self, message, widget, widgets):
+        context = Context(
+            {
+                "WIDGET": widget,
+                "WIDGETS": widgets,
+                "TO_ADDRESS": message.to_address,
+                "TO_EMAIL": message.to_email,
+                "TO_NAME": message.to_name,
+                "FROM_ADDRESS": self.template.from_address,
+                "FROM_EMAIL": self.template.from_email,
+                "FROM_NAME": self.template.from_name,
+                "REPLY_TO_ADDRESS": self.template.reply_to_address,
+                "REPLY_TO_EMAIL": self.template.reply_to_email,
+                "REPLY_TO_NAME": self.template.reply_to_name,
+            }
+        )
+        for name, value in self.variables:
+            context[name] = Template(value).render(context)
+        return (
+            Template(self.template.subject).render(context),
+            Template(self.template.body).render(context),
+        )
+
+    def assertRendered(self, widget, widgets):
+        renderer = MailerRenderer(self.template, [
+            MailerVariable(name=name, value=value)
+            for name, value in self.variables
+        ])
+        message = MailerMessage()
+        renderer.render(message, widget, widgets)
+        self.assertEqual(
+            (message.subject, message.body),
+            self.expected(message, widget, widgets or [widget]),
+        )
+        return message
+
+    def test_widget_message(self):
+        message = self.assertRendered(self.widgets[0], None)
+        self.assertIn("Hello first, The Widgets & Co team", message.body)
+        self.assertIn("WIDGETS &amp; CO", message.body)
+
+    def test_digest_message(self):
+        message = self.assertRendered(None, self.widgets)
+        self.assertEqual(message.subject, "Widgets & Co: digest")
+        self.assertIn("even 2. second (inactive)", message.body)
+
+
+class DKIMTests(TestCase):
+    """Messages are signed with "relaxed/relaxed" canonicalization."""
+
+    def test_canonical_header(self):
+        # RFC 6376, section 3.4.6.
+        self.assertEqual(
+            [
+                canonical_header(field)
+                for field in split_headers(b"A: X\r\nB : Y\t\r\n\tZ  ")
+            ],
+            [b"a:X", b"b:Y Z"],
+        )
+
+    def test_body_hash(self):
+        # RFC 6376, section 3.4.6.
+        self.assertEqual(
+            body_hash(b" C \r\nD \t E\r\n\r\n\r\n"),
+            b64encode(sha256(b" C\r\nD E\r\n").digest()).decode(),
+        )
+        # RFC 6376, section 3.4.4: an empty body hashes as nothing at all.
+        self.assertEqual(
+            body_hash(b"\r\n\r\n"),
+            "47DEQpj8HBSa+/TImW+5JCeuQeRkm5NMpJWZG3hSuFU=",
+        )
+
+    @skipUnless(dkim, "dkimpy and cryptography are not installed")
+    def test_signature_verifies(self):
+        key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        record = b"v=DKIM1; k=rsa; p=" + b64encode(
+            key.public_key().public_bytes(
+                Encoding.DER, PublicFormat.SubjectPublicKeyInfo
+            )
+        )
+        payload = (
+            b"From: Widgets <widgets@example.com>\r\n"
+            b"To: first@example.com\r\n"
+            b"Subject:  Widget\r\n\tstatus \r\n"
+            b"MIME-Version: 1.0\r\n"
+            b"\r\n"
+            b"Two  widgets \r\nchanged.\r\n\r\n"
+        )
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory, "example.com.pem")
+            path.write_bytes(
+                key.private_bytes(
+                    Encoding.PEM, PrivateFormat.PKCS8, NoEncryption()
+                )
+            )
+            private_key.cache_clear()
+            self.addCleanup(private_key.cache_clear)
+            with mock.patch.dict(
+                "apps.mailer.delivery.dkim.DKIM_KEYS",
+                {"example.com": ("mail", str(path))},
+            ):
+                signed = sign_payload(payload)
+        self.assertTrue(signed.startswith(b"DKIM-Signature: "))
+        self.assertTrue(
+            dkim.verify(
+                signed,
+                dnsfunc=lambda name, timeout=5: (
+                    record if name == b"mail._domainkey.example.com." else None
+                ),
+            )
+        )
+        # Changing the body, or a signed header, breaks the signature.
+        self.assertFalse(
+            dkim.verify(
+                signed.replace(b"Two", b"Three"),
+                dnsfunc=lambda name, timeout=5: record,
+            )
+        )
+        self.assertFalse(
+            dkim.verify(
+                signed.replace(b"first@", b"second@"),
+                dnsfunc=lambda name, timeout=5: record,
+            )
+        )
+
+
+class RequiredVariableTests(TestCase):
+    """Only the variables a template uses, however indirectly, are needed."""
+
+    variables = (
+        ("SITE", "Widgets"),
+        ("TEAM", "The {{ SITE }} team"),
+        ("SIGNATURE", "{% if WIDGET %}{{ TEAM }}{% endif %}"),
+        ("FOOTER", "{{ SITE }}"),
+        ("LATER", "Unused"),
+    )
+
+    def test_unused_variables_are_excluded(self):
+        self.assertEqual(
+            required_variables(("{{ WIDGET.name }}",), self.variables),
+            frozenset(),
+        )
+        self.assertEqual(
+            required_variables(("{{ FOOTER }}",), self.variables),
+            {"SITE", "FOOTER"},
+        )
+
+    def test_nested_variables_are_included(self):
+        self.assertEqual(
+            required_variables(
+                ("Subject", "{{ SIGNATURE|upper }}"), self.variables
+            ),
+            {"SITE", "TEAM", "SIGNATURE"},
+        )
+
+    def test_later_variables_are_not_needed_by_earlier_ones(self):
+        variables = (("TEAM", "{{ SITE }}"), ("SITE", "Widgets"))
+        self.assertEqual(
+            required_variables(("{{ TEAM }}",), variables), {"TEAM"}
+        )
+
+    def test_unanalyzable_template_needs_every_variable(self):
+        self.assertIsNone(
+            required_variables(("{% debug %}",), self.variables)
+        )
+
+    def test_unanalyzable_variable_needs_earlier_ones(self):
+        variables = self.variables + (("DEBUG", "{% debug %}"),)
+        self.assertEqual(
+            required_variables(("{{ DEBUG }}",), variables),
+            {name for name, _ in variables},
+        )
+
+    def test_renderer_skips_unused_variables(self):
+        template = MailerTemplate(subject="Status", body="{{ FOOTER }}")
+        renderer = MailerRenderer(template, [
+            MailerVariable(name=name, value=value)
+            for name, value in self.variables
+        ])
+        self.assertEqual(
+            [name for name, _ in renderer.variables], ["SITE", "FOOTER"]
+        )
+
+
+class SuppressionTests(TestCase):
+    """Suppressed addresses are never sent to, however they are cased."""
+
+    def test_bloom_filter_has_no_false_negatives(self):
+        bloom = BloomFilter(capacity=2000)
+        digests = [hash_address("%i@example.com" % i) for i in range(4000)]
+        for digest in digests[:2000]:
+            bloom.add(digest)
+        self.assertTrue(all(digest in bloom for digest in digests[:2000]))
+        false_positives = sum(digest in bloom for digest in digests[2000:])
+        self.assertLess(false_positives, 2000 * 0.05)
+
+    def test_suppressed_addresses(self):
+        suppressions = SuppressionList()
+        import_suppressions([" First@Example.com\n"])
+        self.assertEqual(
+            suppressions.suppressed(
+                {"first@example.COM", "second@example.com"}
+            ),
+            {"first@example.COM"},
+        )
+        # Suppressions added since are read before the next lookup.
+        import_suppressions(["second@example.com"])
+        self.assertEqual(
+            suppressions.suppressed({"second@example.com"}),
+            {"second@example.com"},
+        )
+
+    def test_suppressed_message_is_not_sent(self):
+        import_suppressions(["first@example.com"])
+        MailerMessage.objects.create(
+            to_email="first@example.com", subject="Status", body="Body"
+        )
+        with tempfile.TemporaryDirectory() as directory, mock.patch(
+            "apps.mailer.delivery.engine.JOURNAL_DIR", directory
+        ), mock.patch(
+            "apps.mailer.suppression.suppression_list", SuppressionList()
+        ), mock.patch("apps.mailer.delivery.engine.deliver") as deliver:
+            self.assertEqual(send_messages(MailerMessage.objects.all()), 0)
+        deliver.assert_not_called()
+        self.assertEqual(
+            MailerMessage.objects.get().status, MailerMessageStatus.SUPPRESSED
+        )
+
+    def test_suppressed_messages_are_archived_and_purged(self):
+        for status in (
+            MailerMessageStatus.SUPPRESSED, MailerMessageStatus.QUEUED
+        ):
+            MailerMessage.objects.create(
+                to_email="first@example.com", subject="Status", body="Body",
+                status=status,
+            )
+        self.assertEqual(archive_messages(now() + timedelta(1)), 1)
+        self.assertEqual(
+            MailerArchivedMessage.objects.get().status,
+            MailerMessageStatus.SUPPRESSED,
+        )
+        self.assertEqual(
+            purge_archive(MailerArchivedMessage.objects.all(), pause=0), 1
+        )
+        MailerMessage.objects.update(status=MailerMessageStatus.SUPPRESSED)
+        self.assertEqual(
+            purge_messages(MailerMessage.objects.all(), pause=0), 1
+        )
+        self.assertFalse(MailerMessage.objects.exists())
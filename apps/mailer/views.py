@@ -0,0 +1,66 @@
+import asyncio
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db import connections
+from django.http import (
+    HttpResponse, HttpResponseForbidden, StreamingHttpResponse
+)
+
+from .jobs import Job
+
+
+JOB_EVENTS_INTERVAL = getattr(settings, "MAILER_JOB_EVENTS_INTERVAL", 0.5)
+
+
+def _event(state):
+    """A server-sent event of the state of a job, or of its expiry."""
+    if state is None:
+        return "event: gone\ndata: {}\n\n"
+    return "data: %s\n\n" % json.dumps(state)
+
+
+async def job_events(request, job_id):
+    """
+    Stream the progress of a job as server-sent events, until it finishes.
+
+    An event is sent whenever the state of the job changes. Served from an
+    ASGI server (see asgi.py), waiting for updates holds no worker thread,
+    nor database connection. Served from a WSGI server, which would hold a
+    thread, only the current state is sent, with a "retry" field, and the
+    browser reconnects after JOB_EVENTS_INTERVAL.
+    """
+    user = await request.auser()
+    if not user.is_active or not user.is_staff:
+        return HttpResponseForbidden()
+
+    retry = "retry: %i\n\n" % (JOB_EVENTS_INTERVAL * 1000)
+    if not isinstance(request, ASGIRequest):
+        response = HttpResponse(
+            retry + _event(await Job.aget(str(job_id))),
+            content_type="text/event-stream",
+        )
+    else:
+        # Give the connection of the request back to the pool, for the job.
+        await sync_to_async(connections.close_all)()
+
+        async def events():
+            yield retry
+            last = None
+            while True:
+                state = await Job.aget(str(job_id))
+                if state != last:
+                    yield _event(state)
+                    last = state
+                if state is None or state["status"] != "running":
+                    return
+                await asyncio.sleep(JOB_EVENTS_INTERVAL)
+
+        response = StreamingHttpResponse(
+            events(), content_type="text/event-stream"
+        )
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
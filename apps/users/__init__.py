@@ -6,3 +6,8 @@ class UsersConfig(AppConfig):
     name = "apps.users"
     verbose_name = "User"
     verbose_name_plural =  "Users"
+
+    def ready(self):
+        from . import checks
+        from .signals import connect_signals
+        connect_signals()
@@ -1,14 +1,57 @@
+import time
+
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.backends import ModelBackend
+from django.core.cache import caches
+
+
+AUTH_CACHE = getattr(settings, "USERS_AUTH_CACHE", "default")
+AUTH_CACHE_TIMEOUT = getattr(settings, "USERS_AUTH_CACHE_TIMEOUT", 300)
+GENERATION_KEY = "users:auth:generation"
+
+
+def auth_generation():
+    """Get the current generation of cached users and their permissions."""
+    auth_cache = caches[AUTH_CACHE]
+    generation = auth_cache.get(GENERATION_KEY)
+    if generation is None:
+        generation = time.time_ns()
+        if not auth_cache.add(GENERATION_KEY, generation, None):
+            generation = auth_cache.get(GENERATION_KEY, generation)
+    return generation
+
+
+def invalidate_auth_cache():
+    """Start a new generation, so that all cached users are looked up again."""
+    caches[AUTH_CACHE].set(GENERATION_KEY, time.time_ns(), None)
 
 
 class WidgetUserAuthBackend(ModelBackend):
     """
     User authentication backend.
+
+    Users are cached together with their permissions, until any user, group,
+    or permission changes. AUTH_CACHE must be shared by all server processes,
+    for changes to apply in every one of them at once.
     """
     create_unknown_user = False
     model = get_user_model()
 
     def get_user(self, id=None):
-        """Get a user by user ID."""
-        return self.model.objects.get(id=id)
+        """
+        Get a user by user ID, or None if the user no longer exists, or may
+        not authenticate.
+        """
+        auth_cache = caches[AUTH_CACHE]
+        key = "users:auth:%s:%s" % (auth_generation(), id)
+        user = auth_cache.get(key)
+        if user is None:
+            try:
+                user = self.model.objects.get(id=id)
+            except self.model.DoesNotExist:
+                return None
+            # Permissions are memoized on the user object, and cached with it.
+            self.get_all_permissions(user)
+            auth_cache.set(key, user, AUTH_CACHE_TIMEOUT)
+        return user if self.user_can_authenticate(user) else None
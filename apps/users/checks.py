@@ -0,0 +1,29 @@
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+from .backends import AUTH_CACHE
+
+
+# Cache backends that every process keeps to itself.
+PROCESS_CACHES = ("django.core.cache.backends.locmem.LocMemCache",)
+
+
+@register(Tags.caches, Tags.security)
+def check_auth_cache(app_configs, **kwargs):
+    """
+    Cached users must be shared by every process, so that deactivating a user,
+    or revoking a permission, applies at once in all of them.
+    """
+    backend = settings.CACHES.get(AUTH_CACHE, {}).get("BACKEND")
+    if backend not in PROCESS_CACHES:
+        return []
+    return [
+        Error(
+            "USERS_AUTH_CACHE %r is local to each process." % AUTH_CACHE,
+            hint=(
+                "Use a cache shared by all server processes, such as"
+                " FileBasedCache, DatabaseCache, or RedisCache."
+            ),
+            id="users.E001",
+        )
+    ]
@@ -0,0 +1,23 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group, Permission
+from django.db.models.signals import m2m_changed, post_delete, post_save
+
+from .backends import invalidate_auth_cache
+
+
+def auth_changed(sender, **kwargs):
+    invalidate_auth_cache()
+
+
+def connect_signals():
+    """Invalidate cached users whenever users, groups, or permissions change."""
+    user_model = get_user_model()
+    for model in (user_model, Group, Permission):
+        post_save.connect(auth_changed, sender=model)
+        post_delete.connect(auth_changed, sender=model)
+    for through in (
+        user_model.groups.through,
+        user_model.user_permissions.through,
+        Group.permissions.through,
+    ):
+        m2m_changed.connect(auth_changed, sender=through)
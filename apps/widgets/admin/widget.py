@@ -1,12 +1,65 @@
+import os
+import tempfile
+from functools import partial
+
+from django import forms
 from django.contrib import admin, messages
+from django.core.exceptions import PermissionDenied
 from django.http import HttpResponseRedirect
+from django.shortcuts import render
 from django.urls import path
 from django.utils.timezone import now
 from django.utils.translation import ngettext
 
-from ..models.widget import Widget
+from ..models.widget import CHANGED, Widget
+
+from apps.mailer.jobs import session_jobs, start_job
+
+from ..imports import IMPORT_FORMATS, import_widgets, read_widgets
+from ..notifications import queue_notifications
+
+
+class WidgetImportForm(forms.Form):
+    file = forms.FileField(
+        help_text="CSV or JSONL file of widgets.",
+        label="File",
+    )
+    format = forms.ChoiceField(
+        choices=[(format, format.upper()) for format in IMPORT_FORMATS],
+        label="Format",
+    )
+
+
+# Skipped rows reported in the result of an import job, at most.
+IMPORT_ERRORS_SHOWN = 20
+
 
-from apps.mailer.models.message import MailerMessage
+def import_upload(path, format, user, progress):
+    """
+    Import widgets from an uploaded file, deleting it afterwards.
+
+    Returns the numbers of widgets created and updated, and of rows skipped,
+    along with why the first IMPORT_ERRORS_SHOWN rows were skipped.
+    """
+    errors = []
+
+    def error(line, message):
+        if len(errors) < IMPORT_ERRORS_SHOWN:
+            errors.append("Line %i: %s" % (line, message))
+
+    try:
+        with open(path, "rb") as file:
+            created, updated, invalid = import_widgets(
+                read_widgets(file, format=format),
+                user=user,
+                progress=progress,
+                error=error,
+            )
+    finally:
+        os.unlink(path)
+    if invalid > len(errors):
+        errors.append("And %i more rows." % (invalid - len(errors)))
+    return created, updated, invalid, "".join(" " + line for line in errors)
 
 
 @admin.register(Widget)
@@ -17,7 +70,7 @@ class WidgetAdmin(admin.ModelAdmin):
     date_hierarchy = "created_at"
     fieldsets = (
         ("Widget", {"fields": ("name", "description", "active")}),
-        ("Notifications", {"fields": ("email", "template",)}),
+        ("Notifications", {"fields": ("email", "template", "notified_at")}),
         ("Created", {
             "fields": ("created_at", "created_by"),
             "classes": ("collapse",),
@@ -34,7 +87,9 @@ class WidgetAdmin(admin.ModelAdmin):
         ("created_by", admin.RelatedOnlyFieldListFilter),
         ("updated_by", admin.RelatedOnlyFieldListFilter)
     )
-    readonly_fields = ("created_at", "created_by", "updated_at", "updated_by")
+    readonly_fields = (
+        "created_at", "created_by", "updated_at", "updated_by", "notified_at"
+    )
     save_as = True
     save_on_top = True
     search_fields = ("name", "description", "email", "created_by", "updated_by")
@@ -45,15 +100,29 @@ class WidgetAdmin(admin.ModelAdmin):
         qs = super().get_queryset(request)
         return qs
 
+    def changelist_view(self, request, extra_context=None):
+        extra_context = {
+            "jobs": session_jobs(request), **(extra_context or {})
+        }
+        return super().changelist_view(request, extra_context)
+
     def get_urls(self):
         return [
             path("activate/", self.activate_all),
             path("deactivate/", self.deactivate_all),
             path("queueall/", self.queue_all),
+            path("queuechanged/", self.queue_changed),
+            path(
+                "import/",
+                self.admin_site.admin_view(self.import_widgets_view),
+                name="widgets_widget_import",
+            ),
         ] + super().get_urls()
 
     def activate_all(self, request):
-        self.model.objects.all().update(active=True)
+        self.model.objects.all().update(
+            active=True, updated_at=now(), updated_by=request.user
+        )
         self.message_user(
             request=request,
             message=(
@@ -65,7 +134,9 @@ class WidgetAdmin(admin.ModelAdmin):
         return HttpResponseRedirect("..")
 
     def deactivate_all(self, request):
-        self.model.objects.all().update(active=False)
+        self.model.objects.all().update(
+            active=False, updated_at=now(), updated_by=request.user
+        )
         self.message_user(
             request=request,
             message=(
@@ -77,14 +148,88 @@ class WidgetAdmin(admin.ModelAdmin):
         return HttpResponseRedirect("..")
 
     def queue_all(self, request):
-        self.queue_mail(request, self.model.objects.filter(active=True))
+        widgets = self.model.objects.filter(active=True)
+        start_job(
+            request=request,
+            description=(
+                "Queueing e-mail for all"
+                f" {self.model._meta.verbose_name_plural}."
+            ),
+            function=partial(queue_notifications, widgets),
+            result_message=(
+                f"%d {self.model._meta.verbose_name_plural} e-mails"
+                " were queued."
+            ),
+            total=widgets.count(),
+        )
+        return HttpResponseRedirect("..")
+
+    def queue_changed(self, request):
+        widgets = self.model.objects.filter(CHANGED, active=True)
+        start_job(
+            request=request,
+            description=(
+                "Queueing e-mail for changed"
+                f" {self.model._meta.verbose_name_plural}."
+            ),
+            function=partial(queue_notifications, widgets),
+            result_message=(
+                f"%d {self.model._meta.verbose_name_plural} e-mails"
+                " were queued."
+            ),
+            total=widgets.count(),
+        )
         return HttpResponseRedirect("..")
 
+    def import_widgets_view(self, request):
+        # Rows for existing widgets update them.
+        if not (
+            self.has_add_permission(request)
+            and self.has_change_permission(request)
+        ):
+            raise PermissionDenied
+        form = WidgetImportForm(request.POST or None, request.FILES or None)
+        if request.method == "POST" and form.is_valid():
+            # The upload is kept until the background job has read it.
+            with tempfile.NamedTemporaryFile(delete=False) as copy:
+                for chunk in form.cleaned_data["file"].chunks():
+                    copy.write(chunk)
+            start_job(
+                request=request,
+                description=(
+                    f"Importing {self.model._meta.verbose_name_plural}"
+                    f" from {form.cleaned_data['file'].name}."
+                ),
+                function=partial(
+                    import_upload,
+                    copy.name,
+                    form.cleaned_data["format"],
+                    request.user,
+                ),
+                result_message=(
+                    f"%d {self.model._meta.verbose_name_plural} were created,"
+                    " %d were updated, and %d rows were skipped.%s"
+                ),
+            )
+            return HttpResponseRedirect("..")
+        return render(
+            request=request,
+            template_name="widgets_import.html",
+            context={
+                **self.admin_site.each_context(request),
+                "form": form,
+                "opts": self.model._meta,
+                "title": f"Import {self.model._meta.verbose_name_plural}",
+            },
+        )
+
     @admin.action(
         description=f"Activate selected {model._meta.verbose_name_plural}"
     )
     def activate(self, request, queryset):
-        activated = queryset.update(active=True)
+        activated = queryset.update(
+            active=True, updated_at=now(), updated_by=request.user
+        )
         self.message_user(
             request=request,
             message=ngettext(
@@ -104,7 +249,9 @@ class WidgetAdmin(admin.ModelAdmin):
         description=f"Deactivate selected {model._meta.verbose_name_plural}"
     )
     def deactivate(self, request, queryset):
-        deactivated = queryset.update(active=False)
+        deactivated = queryset.update(
+            active=False, updated_at=now(), updated_by=request.user
+        )
         self.message_user(
             request=request,
             message=ngettext(
@@ -128,14 +275,7 @@ class WidgetAdmin(admin.ModelAdmin):
         )
     )
     def queue_mail(self, request, queryset):
-        num_queued = 0
-        for obj in queryset:
-            if obj.active and obj.email and obj.template:
-                if obj.template.active:
-                    queue_msg = MailerMessage.objects.create()
-                    queue_msg.prepare(widget=obj)
-                    queue_msg.save()
-                    num_queued += 1
+        num_queued = queue_notifications(queryset)
 
         level = messages.WARNING
         if num_queued >= 1:
@@ -0,0 +1,237 @@
+import csv
+import io
+import json
+from itertools import islice
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import connection, transaction
+from django.utils.timezone import now
+
+from apps.mailer.models.template import MailerTemplate
+
+from .models.widget import Widget
+
+
+IMPORT_BATCH_SIZE = getattr(settings, "WIDGETS_IMPORT_BATCH_SIZE", 1000)
+IMPORT_FIELDS = ("name", "description", "active", "email", "template")
+IMPORT_FORMATS = ("csv", "jsonl")
+BOOLEANS = {
+    "1": True, "true": True, "t": True, "yes": True, "y": True,
+    "0": False, "false": False, "f": False, "no": False, "n": False,
+}
+
+
+def read_csv(file):
+    """Read widget rows, with their line numbers, from a binary CSV file."""
+    reader = csv.DictReader(
+        io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+    )
+    for row in reader:
+        yield reader.line_num, row
+
+
+def read_jsonl(file):
+    """
+    Read widget rows, with their line numbers, from a binary JSONL file.
+
+    Lines that are not valid JSON are read as None, to be reported.
+    """
+    for line, data in enumerate(file, start=1):
+        if not data.strip():
+            continue
+        try:
+            yield line, json.loads(data)
+        except ValueError:
+            yield line, None
+
+
+def read_widgets(file, format="csv"):
+    return {"csv": read_csv, "jsonl": read_jsonl}[format](file)
+
+
+def template_map():
+    """
+    Template IDs by name, from a single query.
+
+    Templates sharing a name resolve to the one created first.
+    """
+    return dict(
+        MailerTemplate.objects.order_by("-id").values_list("name", "id")
+    )
+
+
+def _boolean(value):
+    if isinstance(value, bool):
+        return value
+    try:
+        return BOOLEANS[str(value).strip().lower()]
+    except KeyError:
+        raise ValidationError("Not a boolean: %r." % value)
+
+
+def clean_row(row, templates):
+    """
+    Validate an import row, returning its widget field values.
+
+    Only columns present in the row are returned, with empty e-mail address
+    and template columns meaning none. Template names are resolved through
+    templates, so that rows are validated without any query.
+    """
+    if not isinstance(row, dict):
+        raise ValidationError("Not a JSON object.")
+    values = {
+        field: row[field] for field in IMPORT_FIELDS if field in row
+    }
+    if not values.get("name"):
+        raise ValidationError("A name is required.")
+    values["name"] = str(values["name"])
+    if "description" in values:
+        values["description"] = values["description"] or ""
+    if values.get("active") in (None, ""):
+        values.pop("active", None)
+    else:
+        values["active"] = _boolean(values["active"])
+    if "email" in values:
+        values["email"] = values["email"] or None
+    if "template" in values:
+        name = values.pop("template")
+        values["template_id"] = None
+        if name:
+            if name not in templates:
+                raise ValidationError("No template named %r." % name)
+            values["template_id"] = templates[name]
+
+    # Foreign keys are checked against the template map instead.
+    Widget(**values).full_clean(
+        exclude=(
+            "template", "created_by", "updated_at", "updated_by",
+            "notified_at",
+        ),
+        validate_unique=False,
+        validate_constraints=False,
+    )
+    return values
+
+
+def _describe(exc):
+    if not hasattr(exc, "error_dict"):
+        return " ".join(exc.messages)
+    return " ".join(
+        "%s: %s" % (field, " ".join(dict.fromkeys(messages)))
+        for field, messages in exc.message_dict.items()
+    )
+
+
+def update_widgets(widgets, fields):
+    """
+    Save fields of widgets with raw "UPDATE ... FROM (VALUES ...)" statements.
+
+    Unlike bulk_update(), which builds a "CASE" expression over every row,
+    each statement joins the table to a list of new values by ID, so that
+    updating is about as fast as inserting.
+    """
+    table = connection.ops.quote_name(Widget._meta.db_table)
+    columns = [Widget._meta.pk] + [Widget._meta.get_field(f) for f in fields]
+    placeholders = ["%s"] * len(columns)
+    if connection.vendor == "postgresql":
+        # Parameters in a VALUES list have no type of their own.
+        placeholders = [
+            "CAST(%%s AS %s)" % column.cast_db_type(connection)
+            for column in columns
+        ]
+    row = "(%s)" % ", ".join(placeholders)
+    assignments = ", ".join(
+        "%s = v.column%i" % (connection.ops.quote_name(column.column), index)
+        for index, column in enumerate(columns[1:], start=2)
+    )
+    size = connection.ops.bulk_batch_size(columns, widgets)
+    sql = "UPDATE %s SET %s FROM (VALUES %%s) AS v WHERE %s.%s = v.column1" % (
+        table, assignments, table,
+        connection.ops.quote_name(columns[0].column),
+    )
+
+    with connection.cursor() as cursor:
+        for start in range(0, len(widgets), size):
+            chunk = widgets[start:start + size]
+            cursor.execute(
+                sql % ", ".join([row] * len(chunk)),
+                [
+                    column.get_db_prep_save(
+                        getattr(widget, column.attname), connection
+                    )
+                    for widget in chunk for column in columns
+                ],
+            )
+
+
+def _import_batch(batch, user):
+    """Create and update the widgets of a batch, in one transaction."""
+    fields = set()
+    for values in batch.values():
+        fields.update(values)
+    fields.discard("name")
+    if "template_id" in fields:
+        fields.remove("template_id")
+        fields.add("template")
+    started = now()
+
+    with transaction.atomic():
+        existing = list(Widget.objects.filter(name__in=batch))
+        for widget in existing:
+            for field, value in batch[widget.name].items():
+                setattr(widget, field, value)
+            widget.updated_at = started
+            widget.updated_by = user
+        update_widgets(existing, fields=(*fields, "updated_at", "updated_by"))
+        found = {widget.name for widget in existing}
+        created = Widget.objects.bulk_create(
+            [
+                Widget(created_by=user, **values)
+                for name, values in batch.items() if name not in found
+            ]
+        )
+    return len(created), len(existing)
+
+
+def import_widgets(
+    rows, user=None, batch_size=IMPORT_BATCH_SIZE, progress=None, error=None
+):
+    """
+    Create widgets, or update those with the same name, from import rows.
+
+    Rows are (line number, row) pairs, such as read by read_widgets(),
+    taken batch_size at a time. Each batch is validated in memory, then
+    widgets are created with one bulk insert and updated with one bulk
+    update, in a single transaction, so that imports of millions of rows
+    never hold more than a batch. Invalid rows are skipped, calling error
+    with their line number and the reason. After every batch, progress is
+    called with the number of rows read.
+
+    Returns the number of widgets created and updated, and of rows skipped.
+    """
+    templates = template_map()
+    created = updated = invalid = read = 0
+    rows = iter(rows)
+
+    while chunk := list(islice(rows, batch_size)):
+        batch = {}
+        for line, row in chunk:
+            try:
+                values = clean_row(row, templates)
+            except ValidationError as exc:
+                invalid += 1
+                if error is not None:
+                    error(line, _describe(exc))
+                continue
+            # Later rows for the same widget win.
+            batch[values["name"]] = values
+        if batch:
+            batch_created, batch_updated = _import_batch(batch, user)
+            created += batch_created
+            updated += batch_updated
+        read += len(chunk)
+        if progress is not None:
+            progress(read)
+
+    return created, updated, invalid
@@ -0,0 +1,69 @@
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.widgets.imports import (
+    IMPORT_BATCH_SIZE, IMPORT_FORMATS, import_widgets, read_widgets
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Create widgets, or update those with the same name, from a CSV or"
+        " JSONL file with name, description, active, email, and template"
+        " (by name) columns."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSV or JSONL file to import.")
+        parser.add_argument(
+            "--format",
+            choices=IMPORT_FORMATS,
+            help="File format, by default from the file extension.",
+        )
+        parser.add_argument(
+            "--user",
+            help="Username recorded as having created or updated widgets.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=IMPORT_BATCH_SIZE,
+            help="Number of rows imported per transaction.",
+        )
+
+    def handle(self, *args, **options):
+        path = Path(options["path"])
+        format = options["format"] or path.suffix.lstrip(".").lower()
+        if format not in IMPORT_FORMATS:
+            raise CommandError(
+                "Unknown file format %r, use --format." % path.suffix
+            )
+        user = None
+        if options["user"]:
+            try:
+                user = get_user_model().objects.get_by_natural_key(
+                    options["user"]
+                )
+            except get_user_model().DoesNotExist:
+                raise CommandError("Unknown user %r." % options["user"])
+
+        with open(path, "rb") as file:
+            created, updated, invalid = import_widgets(
+                read_widgets(file, format=format),
+                user=user,
+                batch_size=options["batch_size"],
+                progress=lambda read: self.stdout.write(
+                    "%d rows read..." % read
+                ),
+                error=lambda line, message: self.stderr.write(
+                    "Line %d: %s" % (line, message)
+                ),
+            )
+        self.stdout.write(
+            self.style.SUCCESS(
+                "%d widgets created, %d updated, %d rows skipped."
+                % (created, updated, invalid)
+            )
+        )
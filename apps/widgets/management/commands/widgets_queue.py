@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+
+from apps.widgets.models.widget import CHANGED, Widget
+from apps.widgets.notifications import QUEUE_BATCH_SIZE, queue_notifications
+
+
+class Command(BaseCommand):
+    help = (
+        "Queue notification e-mail for active widgets changed since they"
+        " were last notified, or for all active widgets."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Queue e-mail for all active widgets, changed or not.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=QUEUE_BATCH_SIZE,
+            help="Number of widgets queued per transaction.",
+        )
+
+    def handle(self, *args, **options):
+        widgets = Widget.objects.filter(active=True)
+        if not options["all"]:
+            widgets = widgets.filter(CHANGED)
+        queued = queue_notifications(
+            widgets, batch_size=options["batch_size"]
+        )
+        self.stdout.write(
+            self.style.SUCCESS("%d widget e-mails queued." % queued)
+        )
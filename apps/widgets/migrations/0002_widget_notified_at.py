@@ -0,0 +1,25 @@
+# Generated by Django 5.1.6 on 2026-10-19 11:48
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mailer', '0007_mailermessage_queued_uniq'),
+        ('widgets', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='widget',
+            name='notified_at',
+            field=models.DateTimeField(db_column='notified_at', default=None, editable=False, help_text='Date and time when the widget was last notified.', null=True, verbose_name='Notified At'),
+        ),
+        migrations.AddIndex(
+            model_name='widget',
+            index=models.Index(condition=models.Q(('notified_at__isnull', True), ('updated_at__gt', models.F('notified_at')), _connector='OR'), fields=['id'], name='widgets_changed_idx'),
+        ),
+    ]
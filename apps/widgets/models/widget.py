@@ -8,6 +8,13 @@ from django.utils.translation import gettext_lazy as _
 from apps.mailer.models.template import MailerTemplate
 
 
+# Widgets changed since they were last notified.
+CHANGED = (
+    models.Q(notified_at__isnull=True)
+    | models.Q(updated_at__gt=models.F("notified_at"))
+)
+
+
 class Widget(models.Model):
     """
     Widget.
@@ -104,8 +111,25 @@ class Widget(models.Model):
         verbose_name=_("Updated By")
     )
 
+    notified_at = models.DateTimeField(
+        blank=False,
+        db_column="notified_at",
+        editable=False,
+        default=None,
+        null=True,
+        help_text=_("Date and time when the widget was last notified."),
+        verbose_name=_("Notified At")
+    )
+
     class Meta:
         db_table = "widgets"
+        indexes = (
+            models.Index(
+                condition=CHANGED,
+                fields=("id",),
+                name="widgets_changed_idx",
+            ),
+        )
         managed = True
         ordering = ("name",)
         verbose_name = _("Widget")
@@ -0,0 +1,206 @@
+from datetime import timedelta
+from itertools import groupby, islice
+from operator import attrgetter
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils.timezone import now
+
+from apps.mailer.delivery.notify import notify_queued
+from apps.mailer.models.message import OUTSTANDING_STATUSES, MailerMessage
+from apps.mailer.rendering import MailerRenderer
+from apps.mailer.suppression import suppressed_addresses
+
+from .models.widget import Widget
+
+
+QUEUE_BATCH_SIZE = getattr(settings, "WIDGETS_QUEUE_BATCH_SIZE", 500)
+
+
+def notifiable(obj, suppressed=frozenset()):
+    """
+    Whether a widget has an e-mail address, which is not suppressed, and an
+    active template.
+    """
+    return bool(
+        obj.active and obj.email and obj.template and obj.template.active
+        and obj.email not in suppressed
+    )
+
+
+def recent_digests(template):
+    """Addresses that a digest of a template was queued for, in its window."""
+    if not template.digest_window:
+        return frozenset()
+    return frozenset(
+        MailerMessage.objects.filter(
+            template=template,
+            digest=True,
+            created_at__gte=now() - timedelta(minutes=template.digest_window),
+        ).values_list("to_email", flat=True)
+    )
+
+
+def notifications(queryset, batch_size=QUEUE_BATCH_SIZE):
+    """
+    Widgets to notify, as lists of the widgets notified by one message.
+
+    Widgets of digest templates are grouped by template and e-mail address,
+    every other widget is notified on its own.
+    """
+    widgets = queryset.select_related("template")
+    for obj in widgets.exclude(template__digest=True).iterator(
+        chunk_size=batch_size
+    ):
+        yield [obj]
+
+    digests = widgets.filter(template__digest=True).order_by(
+        "template_id", "email", "id"
+    ).iterator(chunk_size=batch_size)
+    for _, group in groupby(digests, key=attrgetter("template_id", "email")):
+        yield list(group)
+
+
+def source(widgets):
+    """What a message is queued for: a widget, or a digest to an address."""
+    template = widgets[0].template
+    if template.digest:
+        return (None, template.pk, widgets[0].email)
+    return (widgets[0].pk, template.pk)
+
+
+def queued_sources(sources):
+    """
+    Which of the sources already have an outstanding message, queued or on
+    its way, in one query.
+    """
+    widget_ids = {source[0] for source in sources if source[0]}
+    emails = {source[2] for source in sources if not source[0]}
+    existing = MailerMessage.objects.filter(
+        Q(widget__in=widget_ids)
+        | Q(digest=True, to_email__in=emails),
+        status__in=OUTSTANDING_STATUSES,
+        template__isnull=False,
+    ).values_list("widget", "template", "to_email", "digest")
+    return {
+        (None, template, to_email) if digest else (widget, template)
+        for widget, template, to_email, digest in existing
+    }
+
+
+def insert_messages(messages):
+    """
+    Insert messages with raw "INSERT ... ON CONFLICT DO NOTHING" statements,
+    returning the number inserted.
+
+    Unlike bulk_create(ignore_conflicts=True), which cannot tell, the IDs
+    of the rows inserted are returned, so that messages rejected by the
+    unique constraints are not counted.
+    """
+    meta = MailerMessage._meta
+    fields = [field for field in meta.concrete_fields if field is not meta.pk]
+    row = "(%s)" % ", ".join(["%s"] * len(fields))
+    sql = (
+        "INSERT INTO %s (%s) VALUES %%s ON CONFLICT DO NOTHING RETURNING %s"
+    ) % (
+        connection.ops.quote_name(meta.db_table),
+        ", ".join(connection.ops.quote_name(field.column) for field in fields),
+        connection.ops.quote_name(meta.pk.column),
+    )
+    size = connection.ops.bulk_batch_size(fields, messages)
+    inserted = 0
+
+    with connection.cursor() as cursor:
+        for start in range(0, len(messages), size):
+            chunk = messages[start:start + size]
+            cursor.execute(
+                sql % ", ".join([row] * len(chunk)),
+                [
+                    field.get_db_prep_save(
+                        field.pre_save(message, add=True), connection
+                    )
+                    for message in chunk for field in fields
+                ],
+            )
+            inserted += len(cursor.fetchall())
+    return inserted
+
+
+def queue_notifications(queryset, batch_size=QUEUE_BATCH_SIZE, progress=None):
+    """
+    Queue notification e-mail for widgets, returning the number queued.
+
+    Only active widgets with an e-mail address, which is not suppressed, and
+    an active template are notified. Every template is compiled once, for
+    all of its widgets.
+    Widgets of a digest template share one message per e-mail address, but
+    none at all while an earlier digest to that address is in its window.
+
+    Widgets, or digest addresses, which already have an outstanding message
+    of the same template are skipped, before rendering. Messages are inserted
+    with one bulk insert per batch, in which the database rejects any that
+    were queued concurrently, which are not counted, and delivery workers
+    are woken once. After every batch, progress is called with the number
+    of widgets done.
+
+    Widgets are stamped as notified at the time the run started, once
+    queued or found to have an outstanding message, so that later runs
+    limited to changed widgets skip them until they change again. Widgets
+    which were not notified, for want of an address or an active template,
+    or held back by a digest window, are left to be notified later.
+    """
+    queued = 0
+    done = 0
+    renderers = {}
+    recent = {}
+    started = now()
+    pending = notifications(queryset, batch_size)
+    while batch := list(islice(pending, batch_size)):
+        sources = {}
+        suppressed = suppressed_addresses(
+            {obj.email for group in batch for obj in group}
+        )
+        for group in batch:
+            widgets = [obj for obj in group if notifiable(obj, suppressed)]
+            if widgets and widgets[0].template.digest:
+                template = widgets[0].template
+                if template.pk not in recent:
+                    recent[template.pk] = recent_digests(template)
+                if widgets[0].email in recent[template.pk]:
+                    continue
+            if widgets:
+                sources.setdefault(source(widgets), widgets)
+
+        with transaction.atomic():
+            existing = queued_sources(sources) if sources else set()
+            messages = []
+            for key, widgets in sources.items():
+                if key in existing:
+                    continue
+                template = widgets[0].template
+                if template.pk not in renderers:
+                    renderers[template.pk] = MailerRenderer(template=template)
+
+                queue_msg = MailerMessage()
+                if template.digest:
+                    queue_msg.prepare(
+                        widgets=widgets, renderer=renderers[template.pk]
+                    )
+                else:
+                    queue_msg.prepare(
+                        widget=widgets[0], renderer=renderers[template.pk]
+                    )
+                messages.append(queue_msg)
+            inserted = insert_messages(messages) if messages else 0
+            if inserted:
+                notify_queued()
+            Widget.objects.filter(
+                id__in=[obj.pk for group in sources.values() for obj in group]
+            ).update(notified_at=started)
+        queued += inserted
+        done += sum(len(widgets) for widgets in batch)
+        if progress is not None:
+            progress(done)
+
+    return queued
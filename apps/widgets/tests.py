@@ -0,0 +1,152 @@
+import io
+import os
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Permission
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from apps.mailer.models.message import MailerMessage
+from apps.mailer.models.template import MailerTemplate
+
+from .admin.widget import import_upload
+from .imports import import_widgets, read_widgets
+from .models.widget import CHANGED, Widget
+from .notifications import queue_notifications
+
+
+class ChangedWidgetTests(TestCase):
+    """Only widgets that were notified are stamped as such."""
+
+    def setUp(self):
+        self.template = MailerTemplate.objects.create(
+            name="status",
+            from_email="widgets@example.com",
+            reply_to_email="widgets@example.com",
+            subject="Widget status",
+            body="{{ WIDGET.name }}",
+        )
+        self.widget = Widget.objects.create(
+            name="first", email="first@example.com", template=self.template
+        )
+
+    def changed(self):
+        return Widget.objects.filter(CHANGED)
+
+    def test_queued_widget_is_stamped(self):
+        self.assertEqual(queue_notifications(self.changed()), 1)
+        self.assertFalse(self.changed().exists())
+
+    def test_widget_with_outstanding_message_is_stamped(self):
+        queue_notifications(Widget.objects.all())
+        Widget.objects.update(notified_at=None)
+        self.assertEqual(queue_notifications(self.changed()), 0)
+        self.assertFalse(self.changed().exists())
+
+    def test_widget_of_inactive_template_is_notified_later(self):
+        self.template.active = False
+        self.template.save()
+        self.assertEqual(queue_notifications(self.changed()), 0)
+        self.template.active = True
+        self.template.save()
+        self.assertEqual(queue_notifications(self.changed()), 1)
+        self.assertEqual(MailerMessage.objects.count(), 1)
+
+
+class ImportTests(TestCase):
+    """Imports create and update widgets, and report the rows they skip."""
+
+    def setUp(self):
+        self.template = MailerTemplate.objects.create(
+            name="status",
+            from_email="widgets@example.com",
+            reply_to_email="widgets@example.com",
+            subject="Widget status",
+            body="{{ WIDGET.name }}",
+        )
+        self.user = get_user_model().objects.create_user(username="importer")
+
+    def import_rows(self, data, format="csv"):
+        errors = []
+        counts = import_widgets(
+            read_widgets(io.BytesIO(data), format=format),
+            user=self.user,
+            error=lambda line, message: errors.append(line),
+        )
+        return counts, errors
+
+    def test_widgets_are_created_and_updated(self):
+        Widget.objects.create(name="first", description="Old")
+        self.assertEqual(
+            self.import_rows(
+                b"name,description,active,email,template\r\n"
+                b"first,New,no,first@example.com,status\r\n"
+                b"second,,yes,,\r\n"
+            ),
+            ((1, 1, 0), []),
+        )
+        first = Widget.objects.get(name="first")
+        self.assertEqual(first.description, "New")
+        self.assertFalse(first.active)
+        self.assertEqual(first.email, "first@example.com")
+        self.assertEqual(first.template, self.template)
+        self.assertEqual(first.updated_by, self.user)
+        second = Widget.objects.get(name="second")
+        self.assertIsNone(second.email)
+        self.assertIsNone(second.template)
+        self.assertEqual(second.created_by, self.user)
+
+    def test_invalid_rows_are_skipped(self):
+        self.assertEqual(
+            self.import_rows(
+                b'{"name": "first"}\n'
+                b"{\n"
+                b'{"description": "No name"}\n'
+                b'{"name": "second", "template": "missing"}\n'
+                b'{"name": "third", "active": "maybe"}\n'
+                b'{"name": "fourth", "email": "not an address"}\n',
+                format="jsonl",
+            ),
+            ((1, 0, 5), [2, 3, 4, 5, 6]),
+        )
+        self.assertEqual(
+            list(Widget.objects.values_list("name", flat=True)), ["first"]
+        )
+
+    def test_upload_reports_skipped_rows(self):
+        with tempfile.NamedTemporaryFile(delete=False) as file:
+            file.write(b"name,active\r\nfirst,yes\r\n,yes\r\n")
+        created, updated, invalid, errors = import_upload(
+            file.name, "csv", self.user, progress=lambda read: None
+        )
+        self.assertEqual((created, updated, invalid), (1, 0, 1))
+        self.assertEqual(errors, " Line 3: A name is required.")
+        self.assertFalse(os.path.exists(file.name))
+
+
+@override_settings(CACHES={
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    "shared": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+})
+class ImportPermissionTests(TestCase):
+    """Importing, which updates widgets, requires the change permission."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username="importer", is_staff=True
+        )
+        self.user.user_permissions.add(
+            Permission.objects.get(codename="add_widget")
+        )
+        self.client.force_login(self.user)
+        self.url = reverse("admin:widgets_widget_import")
+
+    def test_add_permission_is_not_enough(self):
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+    def test_add_and_change_permissions(self):
+        self.user.user_permissions.add(
+            Permission.objects.get(codename="change_widget")
+        )
+        self.assertEqual(self.client.get(self.url).status_code, 200)
@@ -0,0 +1,88 @@
+"""
+Compare admin requests per second with and without connection pooling.
+
+Run from the project directory, against the PostgreSQL database configured
+in settings, with as many threads as a gunicorn worker:
+
+    GUNICORN_THREADS=2 python benchmarks/connection_pool.py --requests 1000
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+
+def run(pool, requests, threads, url):
+    """Time requests to url, returning the number of requests per second."""
+    import django
+    from django.conf import settings
+
+    if not pool:
+        settings.DATABASES["default"].get("OPTIONS", {}).pop("pool", None)
+    settings.ALLOWED_HOSTS = ["testserver"]
+    django.setup()
+
+    from django.contrib.auth import get_user_model
+    from django.test import Client
+
+    user = get_user_model().objects.filter(is_superuser=True).first()
+    if user is None:
+        sys.exit("A superuser is needed to request admin pages.")
+
+    def worker(count):
+        client = Client()
+        client.force_login(user)
+        for _ in range(count):
+            response = client.get(url)
+            assert response.status_code == 200, response.status_code
+
+    counts = [requests // threads] * threads
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(worker, counts))
+    return sum(counts) / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument(
+        "--threads", type=int,
+        default=int(os.environ.get("GUNICORN_THREADS", 2))
+    )
+    parser.add_argument("--url", default="/mailer/mailermessage/")
+    parser.add_argument(
+        "--pool", choices=("on", "off"),
+        help="Run a single mode, in this process."
+    )
+    args = parser.parse_args()
+
+    sys.path.insert(0, str(BASE_DIR))
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "settings")
+
+    if args.pool:
+        rate = run(args.pool == "on", args.requests, args.threads, args.url)
+        print("%.1f" % rate)
+        return
+
+    # Database settings are read once per process, so each mode runs apart.
+    for pool in ("off", "on"):
+        output = subprocess.run(
+            [
+                sys.executable, __file__, "--pool", pool,
+                "--requests", str(args.requests),
+                "--threads", str(args.threads), "--url", args.url,
+            ],
+            capture_output=True, check=True, cwd=BASE_DIR, text=True,
+        ).stdout
+        print("pool %-3s %8s requests/s" % (pool, output.strip()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Compare send loop throughput without DKIM, signing inline, and in a pool.
+
+Batches of messages are built and signed as in send_messages(), then
+handed off to a mail server that takes --handoff-ms per message, without
+any database or network. Run from the project directory:
+
+    python benchmarks/dkim_signing.py --messages 5000 --workers 4
+
+A private key is generated for the run, unless one is given with --key.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+DOMAIN = "example.com"
+
+
+def run(mode, messages, batch_size, workers, handoff, bodies, key):
+    """Time sending messages, returning the number of messages per second."""
+    import django
+    from django.conf import settings
+
+    if mode != "none":
+        settings.MAILER_DKIM_KEYS = {DOMAIN: ("benchmark", key)}
+        settings.MAILER_DKIM_WORKERS = 0 if mode == "inline" else workers
+    django.setup()
+
+    from apps.mailer.delivery.dkim import sign_payloads
+    from apps.mailer.delivery.payload import build_message, build_payload
+    from apps.mailer.delivery.records import DeliveryRecord
+
+    created_at = datetime.now(timezone.utc)
+    records = [
+        DeliveryRecord(
+            pk, created_at, "Widget %i" % pk,
+            "<p>Body %i of the widget e-mail.</p>\n" % (pk % bodies) * 20,
+            "Widgets", "widgets@%s" % DOMAIN, "Widgets", "widgets@%s" % DOMAIN,
+            "Recipient", "recipient%i@example.org" % pk, None, 2, None, None,
+        )
+        for pk in range(1, messages + 1)
+    ]
+    # Start the pool, and parse the key, before timing.
+    sign_payloads([build_payload(build_message(records[0]))])
+
+    started = time.perf_counter()
+    for start in range(0, messages, batch_size):
+        payloads = sign_payloads([
+            build_payload(build_message(record))
+            for record in records[start:start + batch_size]
+        ])
+        for _ in payloads:
+            time.sleep(handoff)
+    return messages / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--messages", type=int, default=5000)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument(
+        "--handoff-ms", type=float, default=0.0,
+        help="Time the mail server takes to accept a message."
+    )
+    parser.add_argument(
+        "--bodies", type=int, default=1,
+        help="Number of distinct message bodies."
+    )
+    parser.add_argument("--key", help="PEM private key to sign with.")
+    parser.add_argument(
+        "--mode", choices=("none", "inline", "pool"),
+        help="Run a single mode, in this process."
+    )
+    args = parser.parse_args()
+
+    sys.path.insert(0, str(BASE_DIR))
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "settings")
+
+    if args.mode:
+        rate = run(
+            args.mode, args.messages, args.batch_size, args.workers,
+            args.handoff_ms / 1000, args.bodies, args.key
+        )
+        print("%.1f" % rate)
+        return
+
+    with tempfile.TemporaryDirectory() as directory:
+        key = args.key
+        if key is None:
+            from cryptography.hazmat.primitives.asymmetric import rsa
+            from cryptography.hazmat.primitives.serialization import (
+                Encoding, NoEncryption, PrivateFormat
+            )
+            key = Path(directory, "dkim.pem")
+            key.write_bytes(
+                rsa.generate_private_key(
+                    public_exponent=65537, key_size=2048
+                ).private_bytes(
+                    Encoding.PEM, PrivateFormat.PKCS8, NoEncryption()
+                )
+            )
+
+        # DKIM settings are read once per process, so each mode runs apart.
+        for mode in ("none", "inline", "pool"):
+            output = subprocess.run(
+                [
+                    sys.executable, __file__, "--mode", mode,
+                    "--messages", str(args.messages),
+                    "--batch-size", str(args.batch_size),
+                    "--workers", str(args.workers),
+                    "--handoff-ms", str(args.handoff_ms),
+                    "--bodies", str(args.bodies), "--key", str(key),
+                ],
+                capture_output=True, check=True, cwd=BASE_DIR, text=True,
+            ).stdout
+            print("dkim %-6s %8s messages/s" % (mode, output.strip()))
+
+
+if __name__ == "__main__":
+    main()
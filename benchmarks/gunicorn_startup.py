@@ -0,0 +1,109 @@
+"""
+Compare gunicorn configurations by cold start latency and worker memory.
+
+For each configuration, gunicorn is started, the time until the first
+response and the latency of the first request to every worker are measured,
+and the resident (RSS) and proportional (PSS, shared pages split between
+processes) memory of each worker is read from /proc. Run from the project
+directory, on Linux:
+
+    python benchmarks/gunicorn_startup.py --workers 4
+"""
+import argparse
+import os
+import signal
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+
+def get(url):
+    """Request url, returning the time taken in seconds."""
+    started = time.perf_counter()
+    try:
+        with urllib.request.urlopen(url, timeout=30) as response:
+            response.read()
+    except urllib.error.HTTPError as error:
+        error.read()
+    return time.perf_counter() - started
+
+
+def memory(pid):
+    """Resident and proportional set size of a process, in KiB."""
+    sizes = {}
+    with open("/proc/%i/smaps_rollup" % pid) as smaps:
+        for line in smaps:
+            key, _, value = line.partition(":")
+            if key in ("Rss", "Pss"):
+                sizes[key] = int(value.split()[0])
+    return sizes["Rss"], sizes["Pss"]
+
+
+def children(pid):
+    with open("/proc/%i/task/%i/children" % (pid, pid)) as tasks:
+        return [int(child) for child in tasks.read().split()]
+
+
+def run(config, workers, port, path):
+    url = "http://127.0.0.1:%i%s" % (port, path)
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [
+            sys.executable, "-m", "gunicorn", "-c", config,
+            "--bind", "127.0.0.1:%i" % port, "--workers", str(workers),
+            "--access-logfile", os.devnull, "--error-logfile", os.devnull,
+            "wsgi",
+        ],
+        cwd=BASE_DIR,
+    )
+    try:
+        while True:
+            try:
+                first = get(url)
+                break
+            except (ConnectionError, urllib.error.URLError):
+                if server.poll() is not None:
+                    sys.exit("gunicorn exited with %i." % server.returncode)
+                time.sleep(0.01)
+        ready = time.perf_counter() - started
+
+        # New connections are spread over workers, so that each one is
+        # likely to serve its first request.
+        latencies = [first] + [get(url) for _ in range(workers * 2 - 1)]
+        rss, pss = zip(*(memory(pid) for pid in children(server.pid)))
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait()
+
+    print(config)
+    print("  first response  %8.0f ms after start" % (ready * 1000))
+    print("  first requests  %8.1f ms median, %.1f ms max" % (
+        statistics.median(latencies) * 1000, max(latencies) * 1000
+    ))
+    print("  worker RSS      %8.1f MiB mean" % (statistics.mean(rss) / 1024))
+    print("  worker PSS      %8.1f MiB mean" % (statistics.mean(pss) / 1024))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--path", default="/login/")
+    parser.add_argument(
+        "configs", nargs="*",
+        default=["gunicorn_configuration.py", "gunicorn_production.py"]
+    )
+    args = parser.parse_args()
+    for config in args.configs:
+        run(config, args.workers, args.port, args.path)
+
+
+if __name__ == "__main__":
+    main()
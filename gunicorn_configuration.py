@@ -1,9 +1,11 @@
+import os
 from multiprocessing import cpu_count
 
 
 worker_class = 'gthread'
 workers = cpu_count() * 2 + 1
-threads = 2
+# Also sizes the database connection pool of each worker, see settings.
+threads = int(os.environ.get('GUNICORN_THREADS', 2))
 keepalive = 300
 capture_output = True
 accesslog = errorlog = "/var/www/djmailer/gunicorn.log"
@@ -0,0 +1,28 @@
+"""
+Production gunicorn configuration.
+
+The application is loaded, and warmed up, once in the master process, and
+the frozen result is shared copy-on-write by every forked worker:
+
+    gunicorn -c gunicorn_production.py wsgi
+"""
+import gc
+
+from gunicorn_configuration import *
+
+
+preload_app = True
+
+# Recycle workers, at staggered times, to bound memory growth.
+max_requests = 1000
+max_requests_jitter = 100
+
+
+def when_ready(server):
+    from apps.core.warmup import warm_up
+
+    warm_up()
+    # Move everything loaded so far out of the garbage collector's reach, so
+    # that collections in workers do not write to, and un-share, its pages.
+    gc.collect()
+    gc.freeze()
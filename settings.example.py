@@ -1,6 +1,9 @@
 """Django settings for djmailer project."""
+import os
 from pathlib import Path
 
+from psycopg_pool import ConnectionPool
+
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent
@@ -8,8 +11,11 @@ BASE_DIR = Path(__file__).resolve().parent
 # SECURITY WARNING: keep the secret key used in production secret!
 SECRET_KEY = 'SecretExampleKey123!@#'
 
+# Production mode, set by DJANGO_ENV=production in the environment.
+PRODUCTION = os.environ.get('DJANGO_ENV') == 'production'
+
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+DEBUG = not PRODUCTION
 
 ALLOWED_HOSTS = ['localhost', '127.0.0.1',]
 
@@ -43,6 +49,7 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'django.middleware.locale.LocaleMiddleware',
+    'apps.core.middleware.ReplicaRoutingMiddleware',
 ]
 
 AUTH_USER_MODEL = "users.WidgetUser"
@@ -55,7 +62,7 @@ TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [],
-        'APP_DIRS': True,
+        'APP_DIRS': not PRODUCTION,
         'OPTIONS': {
             'context_processors': [
                 'django.template.context_processors.debug',
@@ -66,6 +73,15 @@ TEMPLATES = [
         },
     },
 ]
+# Templates are compiled once per process, and never checked for changes,
+# in production. Check them when deploying with "manage.py compile_templates".
+if PRODUCTION:
+    TEMPLATES[0]['OPTIONS']['loaders'] = [
+        ('django.template.loaders.cached.Loader', [
+            'django.template.loaders.filesystem.Loader',
+            'django.template.loaders.app_directories.Loader',
+        ]),
+    ]
 
 WSGI_APPLICATION = 'wsgi.application'
 
@@ -80,9 +96,30 @@ DATABASES = {
         'PASSWORD': 'Secret123!',
         'HOST': 'localhost',
         'PORT': 5432,
+        # Pooled connections are checked before use, so CONN_MAX_AGE stays 0.
+        # Every gunicorn worker has its own pool, one connection per thread,
+        # and per job thread (MAILER_JOB_THREADS).
+        'OPTIONS': {
+            'pool': {
+                'min_size': 1,
+                'max_size': int(os.environ.get('GUNICORN_THREADS', 2)),
+                'timeout': 10,
+                'check': ConnectionPool.check_connection,
+            },
+        },
     }
 }
 
+# Read-only replica, serving admin changelists, facets, and search.
+# Requests after a write stay on the primary for REPLICA_PIN_SECONDS.
+# DATABASES['replica'] = {
+#     **DATABASES['default'],
+#     'HOST': 'replica.example.com',
+#     'TEST': {'MIRROR': 'default'},
+# }
+DATABASE_ROUTERS = ['apps.core.routers.ReplicaRouter']
+REPLICA_PIN_SECONDS = 10
+
 # Password validation.
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',},
@@ -108,3 +145,103 @@ STATIC_ROOT = Path(BASE_DIR, STATIC_URL)
 
 # Default primary key field type.
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# Cache. The 'default' cache is local to each gunicorn worker, the 'shared'
+# cache is shared by all workers on the host.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'OPTIONS': {'MAX_ENTRIES': 1000},
+    },
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': Path(BASE_DIR, 'cache'),
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+}
+
+# Users, cached with their permissions. The cache must be shared by all
+# server processes, so that changes to users, groups, or permissions apply
+# at once, which the system checks enforce.
+USERS_AUTH_CACHE = 'shared'
+USERS_AUTH_CACHE_TIMEOUT = 300
+
+# Mailer. Payloads of messages that were not sent are cached for their
+# retries, which may be run by another worker, so the cache is shared.
+MAILER_PAYLOAD_CACHE = 'shared'
+MAILER_PAYLOAD_CACHE_TIMEOUT = 3600
+MAILER_BODY_CACHE_SIZE = 128
+MAILER_VIEWER_CACHE = 'default'
+MAILER_VIEWER_CACHE_TIMEOUT = 86400
+
+# "Send all", "Cancel all", and "Queue all" run as background jobs, at most
+# MAILER_JOB_THREADS at a time in each gunicorn worker. Their progress is
+# streamed from /mailer/jobs/<id>/events/ by an ASGI server (asgi.py), or
+# polled every MAILER_JOB_EVENTS_INTERVAL seconds from a WSGI server.
+# MAILER_JOB_CACHE must be shared by all server processes.
+MAILER_JOB_CACHE = 'shared'
+MAILER_JOB_THREADS = 2
+MAILER_JOB_TIMEOUT = 86400
+MAILER_JOB_EVENTS_INTERVAL = 0.5
+# Job threads take connections from the pool of their worker too.
+DATABASES['default']['OPTIONS']['pool']['max_size'] += MAILER_JOB_THREADS
+
+# Messages are sent in batches, claimed for MAILER_SEND_LEASE seconds, with
+# each hand-off journaled in MAILER_JOURNAL_DIR for "manage.py mailer_recover".
+# It must be shared by every host that sends mail or recovers it, such as
+# an NFS mount: messages missing from the journal are failed, not resent.
+MAILER_SEND_BATCH_SIZE = 500
+MAILER_SEND_LEASE = 600
+MAILER_JOURNAL_DIR = Path(BASE_DIR, 'journal')
+
+# DKIM signing of mail from these domains, with a selector and a PEM private
+# key each (requires "pip install cryptography"). Each batch is signed by a
+# pool of MAILER_DKIM_WORKERS processes (by default, one per CPU), or in the
+# sending process with 0. Compare with "python benchmarks/dkim_signing.py".
+# MAILER_DKIM_KEYS = {
+#     'example.com': ('mail', Path(BASE_DIR, 'dkim', 'example.com.pem')),
+# }
+MAILER_DKIM_WORKERS = None
+
+# "manage.py mailer_worker" sends messages as soon as they are queued, woken
+# by PostgreSQL NOTIFY on MAILER_NOTIFY_CHANNEL, checking the queue anyway
+# every MAILER_WORKER_POLL seconds.
+MAILER_NOTIFY_CHANNEL = 'mailer_queued'
+MAILER_WORKER_POLL = 60
+
+# Suppressed addresses are never sent e-mail. Senders keep them in a Bloom
+# filter with this false positive rate, rebuilt every MAILER_SUPPRESSION_REBUILD
+# seconds. Import lists with "manage.py mailer_suppress".
+MAILER_SUPPRESSION_ERROR_RATE = 0.01
+MAILER_SUPPRESSION_REBUILD = 3600
+
+# "manage.py mailer_bounces" reads bounces MAILER_BOUNCE_BATCH_SIZE at a time,
+# parsed by MAILER_BOUNCE_WORKERS processes (by default, one per CPU).
+MAILER_BOUNCE_BATCH_SIZE = 1000
+MAILER_BOUNCE_WORKERS = None
+
+# Sent, canceled, and suppressed messages are moved to the archive after this
+# many days, by "manage.py mailer_archive".
+MAILER_ARCHIVE_DAYS = 90
+
+# "manage.py mailer_purge" deletes these messages, and archived messages,
+# after this many days, MAILER_PURGE_BATCH_SIZE at a time, pausing
+# MAILER_PURGE_PAUSE seconds between batches.
+MAILER_PURGE_DAYS = 365
+MAILER_PURGE_BATCH_SIZE = 5000
+MAILER_PURGE_PAUSE = 0.5
+
+# Messages are exported ("Export selected" admin actions, and
+# "manage.py mailer_export") MAILER_EXPORT_CHUNK_SIZE at a time, from the
+# replica database when there is one.
+MAILER_EXPORT_CHUNK_SIZE = 2000
+
+# Spool mode: "Send" exports messages to MAILER_SPOOL_DIR, for
+# "manage.py mailer_spool drain" and "manage.py mailer_spool apply".
+MAILER_SPOOL = False
+MAILER_SPOOL_DIR = Path(BASE_DIR, 'spool')
+
+# Widgets.
+# "manage.py widgets_import" and the admin "Import Widgets" page create or
+# update widgets WIDGETS_IMPORT_BATCH_SIZE rows per transaction.
+WIDGETS_IMPORT_BATCH_SIZE = 1000
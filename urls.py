@@ -19,6 +19,8 @@ from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import path, include
 
+from apps.mailer.views import job_events
+
 
 urlpatterns = []
 urlpatterns += (path('i18n/', include('django.conf.urls.i18n')),)
@@ -26,4 +28,10 @@ urlpatterns += (path('i18n/', include('django.conf.urls.i18n')),)
 if settings.DEBUG:
     urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
 
+urlpatterns += (
+    path(
+        'mailer/jobs/<uuid:job_id>/events/', job_events,
+        name='mailer_job_events'
+    ),
+)
 urlpatterns += (path('', admin.site.urls),)